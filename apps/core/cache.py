@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LRUCache:
+    """Thread-safe in-process cache with a maximum size and an optional time
+    to live. When the cache is full, the least recently used entry is
+    evicted. Hits and misses are counted.
+    """
+    _missing = object()
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries.
+            ttl (float, optional): Seconds until an entry expires.
+                Entries don't expire if None.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Get the value of a key, default if it is missing or expired."""
+        with self._lock:
+            value, expires = self._data.get(key, (self._missing, None))
+            if value is not self._missing and expires is not None \
+                    and expires < monotonic():
+                del self._data[key]
+                value = self._missing
+            if value is self._missing:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value and evict the least recently used entry if the
+        cache is full."""
+        expires = monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key if it is in the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Get the counters of the cache.
+
+        Returns:
+            dict: hits, misses, hit rate and the current size.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._data),
+        }
@@ -0,0 +1,156 @@
+import hashlib
+import json
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+class Catalog:
+    """In-process cache of a small, nearly static reference table like the
+    interests or languages.
+
+    The rows are loaded on first use and kept for CATALOG_TTL seconds.
+    Saving or deleting a row in this process reloads them right away, other
+    processes see the change after the TTL at the latest. The digest of
+    the rows is used as the ETag of the list endpoints.
+    """
+    def __init__(self, model, fields=("id", "name"), order_by=("name",)):
+        """
+        Args:
+            model: Model of the table.
+            fields (tuple, optional): Fields of the cached rows, the first
+                one is the primary key.
+            order_by (tuple, optional): Ordering of the rows.
+        """
+        self.model = model
+        self.fields = fields
+        self.order_by = order_by
+        self.version = 0
+        # (rows, rows by primary key, digest, load time)
+        self._state = None
+        self._lock = Lock()
+
+    def __deepcopy__(self, memo):
+        # Serializer fields are copied with their arguments, the catalog
+        # has to stay shared
+        return self
+
+    def connect(self):
+        """Reload the catalog when a row is saved or deleted."""
+        for signal in (post_save, post_delete):
+            signal.connect(self._changed, sender=self.model,
+                           dispatch_uid=f"catalog_{self.model._meta.label}")
+
+    def _changed(self, sender, **kwargs):
+        self.invalidate()
+        # A rolled back transaction must not stay in the cache either
+        transaction.on_commit(self.invalidate)
+
+    def invalidate(self):
+        """Drop the cached rows, the next access loads them again."""
+        with self._lock:
+            self.version += 1
+            self._state = None
+
+    def _load(self) -> tuple:
+        state = self._state
+        if state is not None and monotonic() - state[3] < settings.CATALOG_TTL:
+            return state
+        with self._lock:
+            version = self.version
+            rows = list(self.model.objects.order_by(*self.order_by)
+                        .values(*self.fields))
+            digest = hashlib.sha1(
+                json.dumps(rows, default=str).encode()).hexdigest()
+            state = (rows, {row[self.fields[0]]: row for row in rows},
+                     digest, monotonic())
+            # Don't keep rows that were changed while they were loaded
+            if version == self.version:
+                self._state = state
+        return state
+
+    def rows(self) -> list:
+        """Get all rows as dicts of the catalog fields."""
+        return self._load()[0]
+
+    def get(self, pk) -> dict:
+        """Get the row of a primary key, None if there is none."""
+        return self._load()[1].get(pk)
+
+    @property
+    def digest(self) -> str:
+        """Hash of the current rows."""
+        return self._load()[2]
+
+
+class CatalogNameField(serializers.CharField):
+    """Read-only field that outputs the name of a foreign key from a
+    catalog, so the related object doesn't need to be loaded. The source
+    has to be the id of the foreign key, e.g. 'language_id'.
+    """
+    def __init__(self, catalog, name_field, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.catalog = catalog
+        self.name_field = name_field
+
+    def to_representation(self, value):
+        row = self.catalog.get(value)
+        return row[self.name_field] if row is not None else None
+
+
+class CatalogPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that checks the ids against a catalog instead of
+    querying each one. Ids that aren't in the catalog yet are looked up in
+    the database.
+    """
+    def __init__(self, catalog, **kwargs):
+        kwargs.setdefault("queryset", catalog.model.objects.all())
+        super().__init__(**kwargs)
+        self.catalog = catalog
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if self.catalog.get(pk) is None:
+            return super().to_internal_value(data)
+        # Only the primary key is needed to relate it
+        return self.catalog.model.from_db(
+            self.get_queryset().db, [self.catalog.fields[0]], [pk])
+
+
+class CatalogListMixin:
+    """Mixin for viewsets of catalog tables that lists the rows from
+    memory. The response has an ETag and a Cache-Control max-age of
+    CATALOG_MAX_AGE seconds, requests with a matching If-None-Match get a
+    304 response without a body. Set 'catalog' on the viewset.
+    """
+    catalog = None
+
+    def list(self, request, *args, **kwargs):
+        # Pages and formats of the list need their own tags
+        etag = '"%s"' % hashlib.sha1(
+            "|".join((self.catalog.digest, request.get_full_path(),
+                      request.accepted_media_type)).encode()
+        ).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            rows = self.catalog.rows()
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                response = self.get_paginated_response(page)
+            else:
+                response = Response(rows)
+        response["ETag"] = etag
+        patch_cache_control(response, max_age=settings.CATALOG_MAX_AGE)
+        return response
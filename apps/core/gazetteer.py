@@ -0,0 +1,189 @@
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from math import cos, radians, sin
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+
+from .utils import MetaSingleton
+
+MAGIC = b"STSPGAZ1"
+HEADER = struct.Struct("<8sI")
+# Mean earth radius in km
+EARTH_RADIUS_KM = 6371.0088
+# Cities further away than 100mi are not returned, like with the GeoDB API
+MAX_DISTANCE_KM = 160.934
+
+
+def to_vector(lat: float, long: float) -> tuple:
+    """Convert a coordinate to a point on the unit sphere. The straight
+    distance between two points grows with their great-circle distance, so
+    the nearest point is the nearest city, even across the antimeridian.
+    """
+    lat, long = radians(float(lat)), radians(float(long))
+    return cos(lat) * cos(long), cos(lat) * sin(long), sin(lat)
+
+
+def build_gazetteer(cities, path):
+    """Write a gazetteer file with the cities stored as an implicit KD-tree.
+
+    The file contains a header, the points of the cities as float32 unit
+    vectors in tree order, the offsets of the names and the utf-8 encoded
+    names. The median of every range of the tree is its root, so no child
+    pointers need to be stored.
+
+    Args:
+        cities (iterable): (name, latitude, longitude) of the cities.
+        path (str): Path of the file to write.
+
+    Returns:
+        int: Number of cities written.
+    """
+    points = [(*to_vector(lat, long), name) for name, lat, long in cities]
+
+    def build(lo, hi, axis):
+        if hi - lo <= 1:
+            return
+        points[lo:hi] = sorted(points[lo:hi], key=lambda point: point[axis])
+        mid = (lo + hi) // 2
+        build(lo, mid, (axis + 1) % 3)
+        build(mid + 1, hi, (axis + 1) % 3)
+
+    build(0, len(points), 0)
+
+    coords = array("f", (value for point in points for value in point[:3]))
+    names = [point[3].encode() for point in points]
+    offsets = array("I", [0])
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+
+    # Running processes have the old file mapped, it's replaced as a whole
+    # instead of truncated under them
+    fd, tmp_path = tempfile.mkstemp(dir=Path(path).parent,
+                                    prefix=f".{Path(path).name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(points)))
+            file.write(coords.tobytes())
+            file.write(offsets.tobytes())
+            file.write(b"".join(names))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(points)
+
+
+def read_geonames(lines, min_population: int = 0):
+    """Read the cities of a GeoNames dump like cities15000.txt.
+
+    Args:
+        lines (iterable): Lines of the tab separated file.
+        min_population (int, optional): Skip smaller cities.
+
+    Yields:
+        tuple: (name, latitude, longitude) of every city.
+    """
+    for line in lines:
+        columns = line.rstrip("\n").split("\t")
+        if len(columns) < 15:
+            continue
+        population = int(columns[14] or 0)
+        if population >= min_population:
+            yield columns[1], float(columns[4]), float(columns[5])
+
+
+class Gazetteer(metaclass=MetaSingleton):
+    """Offline nearest city lookup in the gazetteer file at GAZETTEER_PATH,
+    see 'manage.py build_gazetteer'. The file is memory-mapped on the first
+    lookup, so starting a process doesn't read it.
+    """
+    def __init__(self):
+        # (path, coords, offsets, names) of the loaded file, only assigned
+        # once it's complete so other threads never see a partial one
+        self._data = None
+        self._lock = Lock()
+
+    def _load(self) -> tuple:
+        path = getattr(settings, "GAZETTEER_PATH", None)
+        data = self._data
+        if data is not None and data[0] == path:
+            return data
+        with self._lock:
+            data = self._data
+            if data is not None and data[0] == path:
+                return data
+            # A missing file is checked again on the next lookup
+            if not path or not Path(path).is_file():
+                return None
+            with open(path, "rb") as file:
+                mapped = memoryview(mmap.mmap(file.fileno(), 0,
+                                              access=mmap.ACCESS_READ))
+            magic, count = HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a gazetteer file")
+            start = HEADER.size
+            end = start + count * 12
+            self._data = data = (
+                path,
+                mapped[start:end].cast("f"),
+                mapped[end:end + (count + 1) * 4].cast("I"),
+                mapped[end + (count + 1) * 4:],
+            )
+            return data
+
+    @property
+    def available(self) -> bool:
+        """True if a gazetteer file is configured and exists."""
+        return self._load() is not None
+
+    def nearest_city(self, lat: float, long: float) -> str:
+        """Get the city closest to a given set of coordinates in a radius
+        of 100mi.
+
+        Args:
+            lat (float): latitude
+            long (float): longitude
+
+        Returns:
+            str: Name of the closest city, None if there is none.
+        """
+        data = self._load()
+        if data is None:
+            return None
+        _, coords, offsets, names = data
+        query = to_vector(lat, long)
+        # Squared straight distance of the maximum great-circle distance
+        best = [(2 * sin(MAX_DISTANCE_KM / EARTH_RADIUS_KM / 2)) ** 2, None]
+
+        def search(lo, hi, axis):
+            while lo < hi:
+                mid = (lo + hi) // 2
+                i = mid * 3
+                dist = ((coords[i] - query[0]) ** 2
+                        + (coords[i + 1] - query[1]) ** 2
+                        + (coords[i + 2] - query[2]) ** 2)
+                if dist < best[0]:
+                    best[0], best[1] = dist, mid
+                diff = query[axis] - coords[i + axis]
+                next_axis = (axis + 1) % 3
+                if diff < 0:
+                    near, far = (lo, mid), (mid + 1, hi)
+                else:
+                    near, far = (mid + 1, hi), (lo, mid)
+                search(*near, next_axis)
+                # The other half can only be closer if the splitting plane is
+                if diff * diff >= best[0]:
+                    return
+                lo, hi, axis = *far, next_axis
+
+        search(0, len(coords) // 3, 0)
+        if best[1] is None:
+            return None
+        start, end = offsets[best[1]], offsets[best[1] + 1]
+        return bytes(names[start:end]).decode()
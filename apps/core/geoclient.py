@@ -0,0 +1,195 @@
+import json
+from collections import deque
+from http import client
+from queue import Empty, Full, LifoQueue
+from threading import BoundedSemaphore, Lock
+from time import monotonic, perf_counter
+
+from django.conf import settings
+
+from .utils import GeocodingError, MetaSingleton, get_rapid_api_key
+
+
+class CircuitBreaker:
+    """Stops calls to a failing service for a while.
+
+    After a number of failures in a row the circuit opens and every call
+    fails right away. After the reset timeout one call is let through; if it
+    succeeds, the circuit closes again.
+    """
+    def __init__(self, failures: int, reset_timeout: float):
+        """
+        Args:
+            failures (int): Failures in a row that open the circuit.
+            reset_timeout (float): Seconds until a call is tried again.
+        """
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Check if a call may be made right now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if monotonic() - self.opened_at >= self.reset_timeout:
+                # Let one call through, the next failure opens it again
+                self.opened_at = monotonic()
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.opened_at = monotonic()
+
+
+class GeoDBClient(metaclass=MetaSingleton):
+    """HTTP client of the GeoDB Cities API, shared by all threads of a
+    process. Connections are kept alive and reused, the number of
+    concurrent requests is limited and a circuit breaker fails fast while
+    the API is down or slow. The settings are read once.
+    """
+    HOST = "wft-geo-db.p.rapidapi.com"
+
+    def __init__(self):
+        self.api_key = get_rapid_api_key()
+        self.timeout = settings.GEODB_TIMEOUT
+        self.slow_call = settings.GEODB_SLOW_CALL
+        self.breaker = CircuitBreaker(settings.GEODB_BREAKER_FAILURES,
+                                      settings.GEODB_BREAKER_RESET)
+        self._pool = LifoQueue(maxsize=settings.GEODB_POOL_SIZE)
+        self._slots = BoundedSemaphore(settings.GEODB_MAX_CONCURRENCY)
+        self._lock = Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=1000)
+
+    def _connection(self):
+        """Get an idle connection from the pool or open a new one."""
+        try:
+            return self._pool.get_nowait(), True
+        except Empty:
+            return client.HTTPSConnection(self.HOST, timeout=self.timeout), False
+
+    def _release(self, conn, response):
+        """Put a connection back into the pool if it can be reused."""
+        if response.will_close:
+            conn.close()
+            return
+        try:
+            self._pool.put_nowait(conn)
+        except Full:
+            conn.close()
+
+    def _request(self, url: str):
+        conn, reused = self._connection()
+        try:
+            conn.request("GET", url, headers={
+                "X-RapidAPI-Key": self.api_key,
+                "X-RapidAPI-Host": self.HOST,
+            })
+            response = conn.getresponse()
+            body = response.read()
+        except (client.RemoteDisconnected, ConnectionResetError,
+                BrokenPipeError):
+            conn.close()
+            # The server closed an idle connection, try a new one
+            if reused:
+                return self._request(url)
+            raise
+        except Exception:
+            conn.close()
+            raise
+        self._release(conn, response)
+        return response.status, body
+
+    def get(self, url: str) -> dict:
+        """Send a GET request to the API.
+
+        Args:
+            url (str): Path and query of the request.
+
+        Raises:
+            GeocodingError: If the API can't be reached, answers with an
+                error or the circuit is open.
+
+        Returns:
+            dict: The decoded JSON response.
+        """
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise GeocodingError("GeoDB circuit is open")
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count("rejected")
+            raise GeocodingError("Too many concurrent GeoDB requests")
+
+        start = perf_counter()
+        try:
+            status, body = self._request(url)
+        # connectivity is limited or the service is too slow
+        except (OSError, client.HTTPException) as e:
+            self._finish(start, failed=True)
+            raise GeocodingError(str(e)) from e
+        finally:
+            self._slots.release()
+
+        # rate limits and server errors
+        if status == 429 or status >= 500:
+            self._finish(start, failed=True)
+            raise GeocodingError(f"GeoDB answered with {status}")
+        self._finish(start, failed=False)
+        return json.loads(body.decode())
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _finish(self, start: float, failed: bool):
+        """Record the latency of a call and inform the circuit breaker."""
+        latency = perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.latencies.append(latency)
+            if failed:
+                self.errors += 1
+        if failed or latency > self.slow_call:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+    def stats(self) -> dict:
+        """Get the call counters and the latencies of the last 1000 calls.
+
+        Returns:
+            dict: calls, errors, rejected calls, whether the circuit is open
+                and the average, median and 95th percentile latency in ms.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "circuit_open": self.breaker.is_open,
+            }
+        if latencies:
+            stats.update({
+                "latency_avg_ms": sum(latencies) / len(latencies) * 1000,
+                "latency_p50_ms": latencies[len(latencies) // 2] * 1000,
+                "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+            })
+        return stats
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.gazetteer import build_gazetteer, read_geonames
+
+
+class Command(BaseCommand):
+    help = ("Build the offline gazetteer for the nearest city lookup from a "
+            "GeoNames cities file, e.g. cities15000.txt from "
+            "https://download.geonames.org/export/dump/")
+
+    def add_arguments(self, parser):
+        parser.add_argument("cities", help="Path of the GeoNames cities file")
+        parser.add_argument("--output", default=settings.GAZETTEER_PATH,
+                            help="Path of the gazetteer file to write")
+        parser.add_argument("--min-population", type=int, default=0,
+                            help="Skip cities with a smaller population")
+
+    def handle(self, *args, **options):
+        with open(options["cities"], encoding="utf-8") as file:
+            count = build_gazetteer(
+                read_geonames(file, options["min_population"]),
+                options["output"],
+            )
+        self.stdout.write(f"Wrote {count} cities to {options['output']}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.utils import NearestCityCache
+
+
+class Command(BaseCommand):
+    help = "Delete the expired entries of the nearest city cache."
+
+    def handle(self, *args, **options):
+        deleted = NearestCityCache().evict_expired()
+        self.stdout.write(f"Deleted {deleted} expired cities")
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('lat_cell', models.IntegerField()),
+                ('long_cell', models.IntegerField()),
+                ('city', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='citycache',
+            constraint=models.UniqueConstraint(fields=('lat_cell', 'long_cell'), name='unique city cell'),
+        ),
+    ]
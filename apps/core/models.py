@@ -15,4 +15,22 @@ class SoftDelete(models.Model):
     deleted_on = models.DateTimeField(blank=True, null=True)
     
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class CityCache(CreatedModifiedDateTimeBase):
+    """Model to store the nearest city of a rounded coordinate cell,
+    see utils.NearestCityCache.
+    """
+    lat_cell = models.IntegerField()
+    long_cell = models.IntegerField()
+    # None if there is no city nearby
+    city = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["lat_cell", "long_cell"],
+                name="unique city cell"
+            )
+        ]
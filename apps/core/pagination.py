@@ -0,0 +1,301 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination, _reverse_ordering)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Get the query planner's estimate of the number of rows of a queryset.
+    The estimate is read from the table statistics, no rows are counted.
+
+    Args:
+        queryset (QuerySet): The queryset to estimate.
+
+    Returns:
+        int: The estimated number of rows, None if the database can't
+            estimate it.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CountlessPageNumberPagination(PageNumberPagination):
+    """Page number pagination that can skip the COUNT(*) of the queryset,
+    which costs as much as the page itself for large lists.
+
+    The 'count' parameter selects how the total is computed: 'exact' (the
+    default) counts the rows, 'estimate' returns the planner's estimate
+    and 'none' returns null. Without the exact count, one row more than
+    the page size is fetched to know if there is a next page.
+    """
+    count_query_param = "count"
+    count_modes = ("exact", "estimate", "none")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = request.query_params.get(self.count_query_param)
+        self.countless = self.count_mode in ("estimate", "none")
+        if not self.countless:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            self.number = int(request.query_params.get(
+                self.page_query_param, 1))
+        except ValueError:
+            self.number = 0
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message="That page number is less than 1"))
+
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.number,
+                message="That page contains no results"))
+        self.has_next = len(rows) > page_size
+        self.count = (estimate_count(queryset)
+                      if self.count_mode == "estimate" else None)
+        self.request = request
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.countless:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param,
+                                   self.number + 1)
+
+    def get_previous_link(self):
+        if not self.countless:
+            return super().get_previous_link()
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param,
+                                   self.number - 1)
+
+    def get_paginated_response(self, data):
+        if not self.countless:
+            return super().get_paginated_response(data)
+        return Response({
+            "count": self.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count"]["nullable"] = True
+        return schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            "name": self.count_query_param,
+            "required": False,
+            "in": "query",
+            "description": "How the total is computed: 'exact', "
+                           "'estimate' or 'none'.",
+            "schema": {"type": "string", "enum": list(self.count_modes)},
+        }]
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that continues after the last row of the previous
+    page instead of counting all rows and skipping the previous pages, so
+    deep pages are as fast as the first one.
+
+    Lists are paged in the ordering of their queryset, which has to consist
+    of non-null fields of the model, end with a unique one like
+    ("-created_at", "-id") and should be backed by an index. Unlike in
+    CursorPagination, the position of the cursor is the value of every
+    field of the ordering, so rows with the same first value are neither
+    skipped nor repeated and no OFFSET is needed.
+
+    The page number pagination stays available while the clients are
+    migrated: requests with a 'page' parameter always get it, requests with
+    neither 'page' nor 'cursor' get it unless KEYSET_PAGINATION_DEFAULT is
+    set. An empty 'cursor' parameter requests the first page.
+    """
+    fallback_class = PageNumberPagination
+
+    def __init__(self):
+        self.fallback = None
+
+    def use_cursor(self, request) -> bool:
+        """Check if a request is paged with cursors."""
+        if self.fallback_class.page_query_param in request.query_params:
+            return False
+        return (self.cursor_query_param in request.query_params
+                or settings.KEYSET_PAGINATION_DEFAULT)
+
+    def get_ordering(self, request, queryset, view):
+        # Every list is paged in the ordering of its own queryset
+        ordering = tuple(queryset.query.order_by)
+        assert ordering and all(isinstance(field, str)
+                                for field in ordering), (
+            "KeysetPagination needs a queryset ordered by field names, "
+            f"got {ordering!r}.")
+        self.key_fields = [
+            (field.lstrip("-"), field.startswith("-"),
+             queryset.model._meta.get_field(field.lstrip("-")))
+            for field in ordering]
+        return ordering
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            position = None
+        if (not isinstance(position, list)
+                or len(position) != len(self.key_fields)):
+            raise NotFound(self.invalid_cursor_message)
+        for (_, _, field), value in zip(self.key_fields, position):
+            try:
+                if value is None or isinstance(value, (list, dict)):
+                    raise ValidationError("Invalid value")
+                field.to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=cursor.offset, reverse=cursor.reverse,
+                      position=position)
+
+    def encode_cursor(self, cursor):
+        if isinstance(cursor.position, list):
+            cursor = Cursor(offset=cursor.offset, reverse=cursor.reverse,
+                            position=json.dumps(cursor.position))
+        return super().encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for _, _, field in self.key_fields:
+            value = getattr(instance, field.attname)
+            # isoformat keeps the microseconds
+            position.append(value.isoformat()
+                            if hasattr(value, "isoformat") else value)
+        return position
+
+    def keyset_filter(self, position, reverse: bool) -> Q:
+        """Build the filter for the rows after a position in the ordering,
+        or before it for a reverse cursor."""
+        conditions = []
+        for i, (name, descending, _) in enumerate(self.key_fields):
+            lookup = "lt" if reverse != descending else "gt"
+            equal = {field: value for (field, _, _), value
+                     in zip(self.key_fields[:i], position)}
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": position[i]}))
+        # The first condition bounds the index range
+        name, descending, _ = self.key_fields[0]
+        bound = "lte" if reverse != descending else "gte"
+        return Q(**{f"{name}__{bound}": position[0]}) & reduce(or_, conditions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.fallback = None
+            return self.paginate_keyset(queryset, request, view)
+        self.fallback = self.fallback_class()
+        self.fallback.page_size = self.page_size
+        return self.fallback.paginate_queryset(queryset, request, view)
+
+    def paginate_keyset(self, queryset, request, view=None):
+        """CursorPagination.paginate_queryset with the position of all
+        fields of the ordering."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(current_position, reverse))
+
+        # One row more tells if there is a following page
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position else None)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        # Example values let the schema show paginated examples
+        for name in ("next", "previous"):
+            schema["properties"][name]["example"] = (
+                f"http://api.example.org/accounts/?{self.cursor_query_param}"
+                f"=cD00ODY%3D")
+        return schema
+
+    def get_schema_operation_parameters(self, view):
+        return (super().get_schema_operation_parameters(view)
+                + self.fallback_class().get_schema_operation_parameters(view))
+
+    def to_html(self):
+        if self.fallback is not None:
+            return self.fallback.to_html()
+        return super().to_html()
+
+
+class CountlessKeysetPagination(KeysetPagination):
+    """Keyset pagination whose page numbers can skip the count, see
+    CountlessPageNumberPagination.
+    """
+    fallback_class = CountlessPageNumberPagination
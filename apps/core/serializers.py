@@ -0,0 +1,72 @@
+from operator import attrgetter
+
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework.fields import SkipField
+from rest_framework.relations import (ManyRelatedField, PKOnlyObject,
+                                      RelatedField)
+
+
+def attribute_getter(field):
+    """Build a getter of a field's single attribute source. Anything but a
+    plain attribute, e.g. a missing reverse one-to-one object, is left to
+    the field so the result is the same as with DRF.
+    """
+    getter = attrgetter(field.source_attrs[0])
+
+    def get(instance):
+        try:
+            return getter(instance)
+        except (AttributeError, ObjectDoesNotExist):
+            return field.get_attribute(instance)
+    return get
+
+
+class CompiledReadMixin:
+    """Mixin for ModelSerializers on hot read paths.
+
+    DRF resolves the source of every field again for each object. This
+    mixin looks up the readable fields once per serializer instance and
+    builds each object's dict from attribute getters and the bound
+    to_representation methods of the fields. The output is the same.
+    Include it before ModelSerializer in the bases.
+    """
+    # False uses the field by field implementation of DRF, e.g. to compare
+    compiled = True
+
+    def _compile(self) -> list:
+        model = getattr(getattr(self, "Meta", None), "model", None)
+        fields = []
+        for field in self._readable_fields:
+            source_attrs = field.source_attrs
+            if (len(source_attrs) != 1
+                    or isinstance(field, (RelatedField, ManyRelatedField))
+                    or callable(getattr(model, source_attrs[0], None))):
+                # method fields, dotted sources that can run into missing
+                # or callable attributes, primary keys without loading the
+                # related object and model methods
+                getter = field.get_attribute
+            else:
+                getter = attribute_getter(field)
+            fields.append((field.field_name, getter, field.to_representation))
+        return fields
+
+    def to_representation(self, instance):
+        if not self.compiled:
+            return super().to_representation(instance)
+        try:
+            fields = self._compiled_fields
+        except AttributeError:
+            fields = self._compiled_fields = self._compile()
+
+        ret = {}
+        for name, getter, to_representation in fields:
+            try:
+                attribute = getter(instance)
+            except SkipField:
+                continue
+            if attribute is None or (isinstance(attribute, PKOnlyObject)
+                                     and attribute.pk is None):
+                ret[name] = None
+            else:
+                ret[name] = to_representation(attribute)
+        return ret
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.core import utils
+from apps.core.cache import LRUCache
+from apps.core.geoclient import GeoDBClient
+from apps.core.models import CityCache
+
+
+class TestLRUCache(SimpleTestCase):
+    def test_least_recently_used_is_evicted(self):
+        """Test if the least recently used entry is evicted when full.
+        """
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_entries_expire(self):
+        """Test if entries expire after their time to live.
+        """
+        cache = LRUCache(maxsize=2, ttl=10)
+        with mock.patch("apps.core.cache.monotonic", return_value=100):
+            cache.set("a", 1)
+        with mock.patch("apps.core.cache.monotonic", return_value=105):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch("apps.core.cache.monotonic", return_value=111):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_counters(self):
+        """Test if hits and misses are counted.
+        """
+        cache = LRUCache(maxsize=2)
+        cache.set("a", None)
+        cache.get("a")
+        cache.get("b")
+        cache.get("b")
+        self.assertEqual(cache.stats(), {
+            "hits": 1, "misses": 2, "hit_rate": 1 / 3, "size": 1})
+
+
+@override_settings(GAZETTEER_PATH=None)
+@mock.patch.object(GeoDBClient(), "api_key", "key")
+@mock.patch.object(utils, "request_nearest_city", return_value="Berlin")
+class TestNearestCityCache(TestCase):
+    def setUp(self):
+        utils.NearestCityCache().clear()
+
+    def test_repeated_lookups_are_cached(self, request):
+        """Test if lookups in the same cell only call the api once.
+        """
+        self.assertEqual(utils.lookup_nearest_city(52.52, 13.40), "Berlin")
+        self.assertEqual(utils.lookup_nearest_city(52.51, 13.41), "Berlin")
+        request.assert_called_once()
+        self.assertEqual(utils.NearestCityCache().stats(), {
+            "memory_hits": 1, "db_hits": 0, "misses": 1})
+
+    def test_database_is_shared_between_processes(self, request):
+        """Test if a city cached in the database is used if it is missing
+        in the memory of a process.
+        """
+        utils.lookup_nearest_city(52.52, 13.40)
+        # e.g. a different worker process
+        utils.NearestCityCache().memory.clear()
+        self.assertEqual(utils.lookup_nearest_city(52.52, 13.40), "Berlin")
+        request.assert_called_once()
+        self.assertEqual(utils.NearestCityCache().stats()["db_hits"], 1)
+
+    def test_missing_city_is_cached(self, request):
+        """Test if coordinates without a city nearby are cached as well.
+        """
+        request.return_value = None
+        utils.lookup_nearest_city(0.0, -30.0)
+        utils.NearestCityCache().memory.clear()
+        self.assertIsNone(utils.lookup_nearest_city(0.0, -30.0))
+        request.assert_called_once()
+
+    def test_expired_cities_are_looked_up_again(self, request):
+        """Test if expired cities are requested again and can be pruned.
+        """
+        utils.lookup_nearest_city(52.52, 13.40)
+        utils.NearestCityCache().memory.clear()
+        CityCache.objects.update(
+            modified_at=timezone.now() - timedelta(days=365))
+        self.assertEqual(utils.NearestCityCache().evict_expired(), 1)
+        utils.lookup_nearest_city(52.52, 13.40)
+        self.assertEqual(request.call_count, 2)
@@ -0,0 +1,61 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.timeplace import models
+from apps.timeplace.catalogs import INTERESTS
+from apps.user.models import User
+
+
+class TestCatalog(APITestCase):
+    def setUp(self):
+        # Rows of other tests' rolled back transactions
+        INTERESTS.invalidate()
+        self.addCleanup(INTERESTS.invalidate)
+
+    def test_list_is_read_from_memory(self):
+        """Test if the interest list doesn't query the database once the
+        catalog is loaded and has the rows of the table.
+        """
+        url = reverse("interest-list")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"],
+                         models.Interest.objects.count())
+        self.assertEqual(
+            response.data["results"],
+            list(models.Interest.objects.order_by("name")
+                 .values("id", "name")[:len(response.data["results"])]))
+
+    def test_unchanged_list_is_not_modified(self):
+        """Test if a request with the ETag of the list gets a 304.
+        """
+        url = reverse("interest-list")
+        response = self.client.get(url)
+        self.assertEqual(response["Cache-Control"], "max-age=60")
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        # Every page has its own tag
+        response = self.client.get(url, {"page": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_changes_invalidate_the_catalog(self):
+        """Test if a superuser's changes are listed right away with a new
+        ETag.
+        """
+        url = reverse("interest-list")
+        etag = self.client.get(url)["ETag"]
+        # Not saved, other tests rely on the ids of their users
+        self.client.force_authenticate(
+            User(username="admin_catalog", is_superuser=True))
+        response = self.client.put(reverse("interest-detail", args=(1,)),
+                                   {"name": "AAA Renamed"})
+        self.assertEqual(response.data, {"id": 1, "name": "AAA Renamed"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0],
+                         {"id": 1, "name": "AAA Renamed"})
@@ -0,0 +1,86 @@
+import random
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from geopy.distance import great_circle
+
+from apps.core import utils
+from apps.core.gazetteer import Gazetteer, build_gazetteer
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+class TestGazetteer(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.tmpdir.name) / "gazetteer.bin"
+        call_command("build_gazetteer", str(FIXTURES / "cities.txt"),
+                     output=cls.path, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def test_nearest_city(self):
+        """Test if the nearest city of the fixture file is found.
+        """
+        with override_settings(GAZETTEER_PATH=self.path):
+            gazetteer = Gazetteer()
+            self.assertTrue(gazetteer.available)
+            self.assertEqual(gazetteer.nearest_city(52.50, 13.30), "Berlin")
+            self.assertEqual(gazetteer.nearest_city(52.40, 13.10), "Potsdam")
+            self.assertEqual(gazetteer.nearest_city(78.0, 15.0), "Longyearbyen")
+            # Across the antimeridian
+            self.assertEqual(gazetteer.nearest_city(-16.5, -179.9), "Labasa")
+            # Nothing within 100mi
+            self.assertIsNone(gazetteer.nearest_city(0.0, -30.0))
+
+    def test_lookup_uses_gazetteer(self):
+        """Test if lookup_nearest_city uses the gazetteer without a network
+        connection or api key.
+        """
+        with override_settings(GAZETTEER_PATH=self.path):
+            self.assertEqual(utils.lookup_nearest_city(53.5, 10.0), "Hamburg")
+        with override_settings(GAZETTEER_PATH=None):
+            self.assertFalse(Gazetteer().available)
+
+    def test_matches_brute_force(self):
+        """Test if the KD-tree finds the same cities as comparing the
+        distances to all cities.
+        """
+        rng = random.Random(7)
+        cities = [(f"city{i}", rng.uniform(45, 55), rng.uniform(5, 15))
+                  for i in range(2000)]
+        path = Path(self.tmpdir.name) / "random.bin"
+        build_gazetteer(cities, path)
+        with override_settings(GAZETTEER_PATH=path):
+            for _ in range(200):
+                point = (rng.uniform(45, 55), rng.uniform(5, 15))
+                expected = min(cities, key=lambda city: great_circle(
+                    point, city[1:]).km)
+                self.assertEqual(Gazetteer().nearest_city(*point),
+                                 expected[0])
+
+    def test_rebuild_replaces_the_file(self):
+        """Test if a missing file is picked up once it's built and a rebuild
+        leaves the file mapped by running lookups intact.
+        """
+        directory = Path(self.tmpdir.name) / "rebuild"
+        directory.mkdir()
+        path = directory / "gazetteer.bin"
+        with override_settings(GAZETTEER_PATH=path):
+            self.assertFalse(Gazetteer().available)
+            build_gazetteer([("Berlin", 52.52437, 13.41053)], path)
+            self.assertEqual(Gazetteer().nearest_city(52.5, 13.4), "Berlin")
+
+            build_gazetteer([("Potsdam", 52.39886, 13.06566)], path)
+            # The mapped file is still the old one
+            self.assertEqual(Gazetteer().nearest_city(52.5, 13.4), "Berlin")
+        self.assertEqual([file.name for file in directory.iterdir()],
+                         ["gazetteer.bin"])
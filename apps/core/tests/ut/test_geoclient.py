@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.core import geoclient
+from apps.core.geoclient import CircuitBreaker, GeoDBClient
+from apps.core.utils import GeocodingError
+
+
+def fake_connection(status=200, body=b'{"data": []}', will_close=False):
+    conn = mock.Mock()
+    conn.getresponse.return_value = mock.Mock(
+        status=status, will_close=will_close,
+        read=mock.Mock(return_value=body))
+    return conn
+
+
+@override_settings(GEODB_BREAKER_FAILURES=2, GEODB_BREAKER_RESET=30,
+                   GEODB_POOL_SIZE=2, GEODB_MAX_CONCURRENCY=2)
+class TestGeoDBClient(SimpleTestCase):
+    def setUp(self):
+        # Every test gets its own client, the shared one is restored after
+        self.addCleanup(setattr, GeoDBClient, "_instance",
+                        GeoDBClient._instance)
+        GeoDBClient._instance = None
+        patcher = mock.patch.object(geoclient.client, "HTTPSConnection")
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_connection_is_reused(self):
+        """Test if consecutive requests share one keep-alive connection.
+        """
+        self.connect.return_value = fake_connection()
+        client = GeoDBClient()
+        self.assertEqual(client.get("/one"), {"data": []})
+        self.assertEqual(client.get("/two"), {"data": []})
+        self.connect.assert_called_once()
+        self.assertEqual(self.connect.return_value.request.call_count, 2)
+
+    def test_closed_connection_is_not_reused(self):
+        """Test if a connection the server wants to close is not pooled.
+        """
+        self.connect.side_effect = lambda *args, **kwargs: fake_connection(
+            will_close=True)
+        client = GeoDBClient()
+        client.get("/one")
+        client.get("/two")
+        self.assertEqual(self.connect.call_count, 2)
+
+    def test_stale_connection_is_retried(self):
+        """Test if a pooled connection closed by the server is replaced.
+        """
+        stale = fake_connection()
+        stale.request.side_effect = [
+            None, geoclient.client.RemoteDisconnected("closed")]
+        self.connect.side_effect = [stale, fake_connection()]
+        client = GeoDBClient()
+        client.get("/one")
+        self.assertEqual(client.get("/two"), {"data": []})
+        self.assertEqual(self.connect.call_count, 2)
+        self.assertEqual(client.stats()["errors"], 0)
+
+    def test_circuit_opens_after_failures(self):
+        """Test if the client fails fast after failures in a row and tries
+        again after the reset timeout.
+        """
+        self.connect.return_value = fake_connection(status=503,
+                                                    will_close=True)
+        client = GeoDBClient()
+        for _ in range(2):
+            with self.assertRaises(GeocodingError):
+                client.get("/down")
+        with self.assertRaisesMessage(GeocodingError, "circuit is open"):
+            client.get("/down")
+        self.assertEqual(self.connect.return_value.request.call_count, 2)
+
+        self.connect.return_value = fake_connection()
+        client.breaker.opened_at -= 30
+        self.assertEqual(client.get("/up"), {"data": []})
+        self.assertFalse(client.breaker.is_open)
+        stats = client.stats()
+        self.assertEqual((stats["calls"], stats["errors"], stats["rejected"]),
+                         (3, 2, 1))
+
+    @override_settings(GEODB_SLOW_CALL=0)
+    def test_slow_calls_open_the_circuit(self):
+        """Test if calls slower than GEODB_SLOW_CALL count as failures.
+        """
+        self.connect.return_value = fake_connection()
+        client = GeoDBClient()
+        client.get("/slow")
+        client.get("/slow")
+        self.assertTrue(client.breaker.is_open)
+
+    @override_settings(GEODB_TIMEOUT=0)
+    def test_concurrency_is_limited(self):
+        """Test if requests are rejected while all slots are in use.
+        """
+        client = GeoDBClient()
+        for _ in range(2):
+            client._slots.acquire()
+        with self.assertRaisesMessage(GeocodingError, "Too many concurrent"):
+            client.get("/busy")
+        self.connect.assert_not_called()
+
+
+class TestCircuitBreaker(SimpleTestCase):
+    def test_success_resets_failures(self):
+        """Test if only failures in a row open the circuit.
+        """
+        breaker = CircuitBreaker(failures=2, reset_timeout=30)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
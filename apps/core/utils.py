@@ -1,10 +1,17 @@
 import environ
-import json
-from http import client
+from datetime import timedelta
+from functools import wraps
 from pathlib import Path
-from socket import gaierror
+from threading import Lock
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils import timezone
+
+from .cache import LRUCache
+from .models import CityCache
 
 
 class MetaSingleton(type):
@@ -17,6 +24,11 @@ class MetaSingleton(type):
         return cls._instance
 
 
+class GeocodingError(Exception):
+    """Raised when the geocoding service could not be reached or did not
+    answer properly. Trying again later might succeed."""
+
+
 def get_nearest_city(lat: float, long: float) -> str:
     """Get the city closest to a given set of coordinates in a radius of 100mi.
 
@@ -25,18 +37,75 @@ def get_nearest_city(lat: float, long: float) -> str:
         long (float): longitude
 
     Returns:
-        str: Name of the closest city to the given coordinates.
+        str: Name of the closest city to the given coordinates or None if it
+            couldn't be looked up.
+    """
+    try:
+        return lookup_nearest_city(lat, long)
+    except GeocodingError:
+        return None
+
+
+def get_rapid_api_key() -> str:
+    """Get the api key of the GeoDB Cities API, None if it isn't configured.
     """
     BASE_DIR = Path(__file__).resolve().parent.parent.parent
     env = environ.Env()
     environ.Env.read_env(str(BASE_DIR / ".env"))
 
     try:
-        RAPID_API = env.str("RAPID_API")
+        return env.str("RAPID_API")
     except ImproperlyConfigured:
         return None
 
-    conn = client.HTTPSConnection("wft-geo-db.p.rapidapi.com", timeout=2)
+
+def lookup_nearest_city(lat: float, long: float) -> str:
+    """Get the city closest to a given set of coordinates in a radius of 100mi.
+    Uses the offline gazetteer if one is configured, otherwise results of the
+    GeoDB API are cached for the surrounding coordinate cell.
+
+    Args:
+        lat (float): latitude
+        long (float): longitude
+
+    Raises:
+        GeocodingError: If the geocoding service couldn't be reached.
+
+    Returns:
+        str: Name of the closest city to the given coordinates, None if there
+            is no city or no api key is configured.
+    """
+    from .gazetteer import Gazetteer
+
+    # The offline gazetteer doesn't need a network connection
+    gazetteer = Gazetteer()
+    if gazetteer.available:
+        return gazetteer.nearest_city(lat, long)
+
+    from .geoclient import GeoDBClient
+
+    if not GeoDBClient().api_key:
+        return None
+    return NearestCityCache().get_city(
+        lat, long, lambda: request_nearest_city(lat, long))
+
+
+def request_nearest_city(lat: float, long: float) -> str:
+    """Request the city closest to a given set of coordinates in a radius of
+    100mi from the GeoDB Cities API.
+
+    Args:
+        lat (float): latitude
+        long (float): longitude
+
+    Raises:
+        GeocodingError: If the geocoding service couldn't be reached.
+
+    Returns:
+        str: Name of the closest city to the given coordinates, None if there
+            is no city.
+    """
+    from .geoclient import GeoDBClient
 
     # we need a + in the url if the longitude is not negative
     if long < 0:
@@ -51,20 +120,120 @@ def get_nearest_city(lat: float, long: float) -> str:
            + str(long)
            + "/nearbyCities?limit=1&radius=100"
     )
-    headers = {
-        "X-RapidAPI-Key": RAPID_API,
-        "X-RapidAPI-Host": "wft-geo-db.p.rapidapi.com"
-    }
-    try:
-        conn.request("GET", url, headers=headers)
-    # prevent exception when internet connectivity is limited
-    except (TimeoutError, gaierror):
-        return None
-    response = conn.getresponse()
-    data = json.loads(response.read().decode())
+    data = GeoDBClient().get(url)
     try:
         city = data["data"][0]["city"]
     except:
         city = None
 
     return city
+
+
+class NearestCityCache(metaclass=MetaSingleton):
+    """Two-tier cache of the nearest cities, in memory of this process and in
+    the CityCache table. Coordinates are rounded to cells of
+    GEOCODING_CACHE_CELL degrees, which share their nearest city.
+    """
+    def __init__(self):
+        self.ttl = timedelta(seconds=settings.GEOCODING_CACHE_TTL)
+        self.memory = LRUCache(settings.GEOCODING_CACHE_SIZE,
+                               settings.GEOCODING_CACHE_TTL)
+        self.db_hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def cell(self, lat: float, long: float) -> tuple:
+        """Get the cell of a coordinate."""
+        size = settings.GEOCODING_CACHE_CELL
+        return round(float(lat) / size), round(float(long) / size)
+
+    def get_city(self, lat: float, long: float, fetch) -> str:
+        """Get the cached city of a coordinate, call fetch to get it if it
+        isn't cached or expired.
+
+        Args:
+            lat (float): latitude
+            long (float): longitude
+            fetch (callable): Gets the city if it isn't cached.
+
+        Returns:
+            str: Name of the city, None if there is no city nearby.
+        """
+        key = self.cell(lat, long)
+        cached = self.memory.get(key, LRUCache._missing)
+        if cached is not LRUCache._missing:
+            return cached
+
+        row = (CityCache.objects
+               .filter(lat_cell=key[0], long_cell=key[1],
+                       modified_at__gte=timezone.now() - self.ttl)
+               .values_list("city")
+               .first())
+        if row is not None:
+            with self._lock:
+                self.db_hits += 1
+            self.memory.set(key, row[0])
+            return row[0]
+
+        with self._lock:
+            self.misses += 1
+        city = fetch()
+        CityCache.objects.update_or_create(
+            lat_cell=key[0], long_cell=key[1], defaults={"city": city})
+        self.memory.set(key, city)
+        return city
+
+    def evict_expired(self) -> int:
+        """Delete the expired entries from the database.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        deleted, _ = (CityCache.objects
+                      .filter(modified_at__lt=timezone.now() - self.ttl)
+                      .delete())
+        return deleted
+
+    def clear(self):
+        """Empty the memory tier and reset the counters."""
+        self.memory.clear()
+        with self._lock:
+            self.db_hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Get the hit and miss counters of both tiers.
+
+        Returns:
+            dict: memory_hits, db_hits and misses (external lookups).
+        """
+        return {
+            "memory_hits": self.memory.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+        }
+
+
+def close_old_connections():
+    """Close the database connections that broke or reached CONN_MAX_AGE,
+    like Django does before and after every request. Connections inside a
+    transaction are left alone."""
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+def database_sync_to_async(func):
+    """sync_to_async for database access outside of Django's request
+    cycle, e.g. in a WebSocket application. The connections are checked
+    before and after the call, so a broken connection of the shared sync
+    thread is replaced instead of failing every later call.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
@@ -0,0 +1,75 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """Mixin for viewsets of models with a modified_at column that answers
+    list and retrieve requests with 304 Not Modified if the client already
+    has the current version, without serializing anything.
+
+    The version of a list is the latest modified_at and the number of rows
+    of the queryset, read with one aggregate query. The version of a single
+    object is its modified_at. The digests of the catalogs in 'catalogs'
+    are part of both, for output that contains catalog names. Responses
+    carry an ETag and have to be revalidated by the client. Only single
+    objects also get a Last-Modified header, a date can't tell that a row
+    of a list was removed.
+    """
+    modified_field = "modified_at"
+    catalogs = ()
+
+    def get_last_modified(self, last_modified):
+        """Hook to move the last modification time, e.g. for output that
+        is computed from the current date."""
+        return last_modified
+
+    def _conditional_response(self, request, last_modified, *version,
+                              dated=True):
+        """Get the validators of a response and a 304 response if the
+        client's copy is still current, otherwise None. Without 'dated'
+        there is no Last-Modified date."""
+        last_modified = self.get_last_modified(last_modified)
+        # The same url has different content for different users
+        etag = '"%s"' % hashlib.sha1("|".join(str(part) for part in (
+            request.get_full_path(), request.accepted_media_type,
+            request.user.pk, last_modified, *version,
+            *(catalog.digest for catalog in self.catalogs),
+        )).encode()).hexdigest()
+        # HTTP dates have no fractions of seconds
+        timestamp = None
+        if dated and last_modified is not None:
+            timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        return etag, timestamp, response
+
+    def _add_validators(self, response, etag, timestamp):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        version = queryset.aggregate(last_modified=Max(self.modified_field),
+                                     count=Count("pk"))
+        etag, timestamp, response = self._conditional_response(
+            request, version["last_modified"], version["count"],
+            dated=False)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return self._add_validators(response, etag, timestamp)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, timestamp, response = self._conditional_response(
+            request, getattr(instance, self.modified_field), instance.pk)
+        if response is None:
+            serializer = self.get_serializer(instance)
+            response = Response(serializer.data)
+        return self._add_validators(response, etag, timestamp)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MatchConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.match"
+
+    def ready(self):
+        # Wake up the long-polling feed requests
+        from . import signals  # noqa: F401
@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+import re
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import DatabaseError, DataError, IntegrityError, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.core.utils import database_sync_to_async
+from apps.user.authentication import CachedTokenAuthentication
+from . import feed, models, serializers
+
+logger = logging.getLogger(__name__)
+
+# ws/v1/match/<id>/chat/?token=<token>
+CHAT_PATH = re.compile(r"^/ws/v1/match/(?P<pk>[0-9]+)/chat/$")
+
+MAX_LENGTH = models.MatchChat._meta.get_field("message").max_length
+
+# Close codes of refused connections
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+
+_broker = None
+_writer = None
+
+
+class MemoryBroker:
+    """Publish/subscribe of chat messages in this process, every match has
+    its own set of subscriber queues.
+
+    It only reaches the connections of one process. A broker with the same
+    methods that publishes through e.g. Redis can be set in CHAT_BROKER to
+    serve the chats from several processes.
+    """
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    async def subscribe(self, match_id: int) -> asyncio.Queue:
+        """Get a queue that receives the messages of a match."""
+        queue = asyncio.Queue(maxsize=settings.CHAT_QUEUE_SIZE)
+        self._subscribers[match_id].add(queue)
+        return queue
+
+    async def unsubscribe(self, match_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(match_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[match_id]
+
+    async def publish(self, match_id: int, message: dict):
+        """Send a message to all subscribers of a match."""
+        for queue in list(self._subscribers.get(match_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client that doesn't read must not hold up the others
+                logger.warning("Dropped a message of match %s for a slow "
+                               "client", match_id)
+
+
+class ChatWriter:
+    """Collects the chat messages of all connections and saves them with one
+    insert per CHAT_FLUSH_SIZE messages, or after CHAT_FLUSH_INTERVAL seconds
+    at the latest.
+
+    Saving never raises into a connection. When the database can't be
+    reached the messages are kept and tried again after the interval, up
+    to CHAT_MAX_PENDING messages, the oldest ones beyond are dropped. When
+    the batch itself is refused, e.g. for a match that was deleted in the
+    meantime, the messages are saved one by one and only the refused ones
+    are dropped.
+    """
+    def __init__(self):
+        self._rows = []
+        self._timer = None
+        # Tasks without a reference can be garbage collected while running
+        self._tasks = set()
+
+    async def add(self, match_id: int, user_id: int, message: str):
+        """Collect a message.
+
+        Returns:
+            MatchChat: The unsaved message with its uuid and creation time.
+        """
+        row = models.MatchChat(match_id_id=match_id, user_id_id=user_id,
+                               message=message)
+        self._rows.append(row)
+        if len(self._rows) >= settings.CHAT_FLUSH_SIZE:
+            await self.flush()
+        else:
+            self._schedule()
+        return row
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                settings.CHAT_FLUSH_INTERVAL, self._flush_later)
+
+    def _flush_later(self):
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Save all collected messages."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        try:
+            retry = await database_sync_to_async(save_messages)(rows)
+        except Exception:
+            logger.exception("Couldn't save %s chat messages, trying again",
+                             len(rows))
+            retry = rows
+        if retry:
+            self._rows[:0] = retry
+            overflow = len(self._rows) - settings.CHAT_MAX_PENDING
+            if overflow > 0:
+                logger.error("Dropped %s unsaved chat messages, more than "
+                             "CHAT_MAX_PENDING are waiting", overflow)
+                del self._rows[:overflow]
+            self._schedule()
+
+
+def save_messages(rows: list) -> list:
+    """Insert chat messages with one query, or one by one if the batch is
+    refused, and wake up the feed requests of their users.
+
+    Args:
+        rows (list): The unsaved MatchChat objects.
+
+    Returns:
+        list: The messages that have to be tried again because the database
+            failed, refused messages are logged and dropped.
+    """
+    try:
+        with transaction.atomic():
+            models.MatchChat.objects.bulk_create(rows)
+        saved, retry = rows, []
+    except (IntegrityError, DataError):
+        saved, retry = [], []
+        for i, row in enumerate(rows):
+            try:
+                with transaction.atomic():
+                    models.MatchChat.objects.bulk_create([row])
+            except (IntegrityError, DataError):
+                logger.exception("Dropped a chat message of match %s",
+                                 row.match_id_id)
+            except DatabaseError:
+                logger.exception("Couldn't save %s chat messages, trying "
+                                 "again", len(rows) - i)
+                retry = rows[i:]
+                break
+            else:
+                saved.append(row)
+    if saved:
+        # bulk_create sends no signals. The messages are saved, a failure
+        # here must not save them again.
+        try:
+            feed.notify_matches({row.match_id_id for row in saved})
+        except DatabaseError:
+            logger.exception("Couldn't notify the feed of new messages")
+    return retry
+
+
+def get_broker():
+    """Get the broker of this process, see CHAT_BROKER."""
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.CHAT_BROKER)()
+    return _broker
+
+
+def get_writer() -> ChatWriter:
+    """Get the writer of this process."""
+    global _writer
+    if _writer is None:
+        _writer = ChatWriter()
+    return _writer
+
+
+def get_token(scope) -> str:
+    """Get the API token of a WebSocket connection from the 'token' query
+    parameter, browsers can't set headers, or the Authorization header.
+    """
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if "token" in query:
+        return query["token"][0]
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            keyword, _, key = value.decode().partition(" ")
+            if keyword == "Token":
+                return key
+    return None
+
+
+def authorize(token: str, match_id: int):
+    """Get the user of a token if the user takes part in a match that
+    isn't deleted.
+
+    Args:
+        token (str): API token of the connection.
+        match_id (int): Id of the match.
+
+    Returns:
+        tuple: The user, None if the token is invalid, and whether the user
+            may join the chat.
+    """
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(token)
+    except AuthenticationFailed:
+        return None, False
+    allowed = (models.Match.objects
+               .filter(pk=match_id, deleted=False)
+               .filter(Q(timeplace_1__user=user) | Q(timeplace_2__user=user))
+               .exists())
+    return user, allowed
+
+
+async def chat_application(scope, receive, send):
+    """ASGI application of the match chats.
+
+    The token and the match are checked once when the WebSocket connects.
+    Then every text frame {"message": "..."} is published to all
+    connections of the match like a message of the chat history, see
+    MatchChatModelSerializer, and saved in the background by the
+    ChatWriter. Its 'id' is null until it's saved, clients merge the
+    published messages and the history by 'uuid'.
+    """
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+    path = CHAT_PATH.match(scope["path"])
+    token = get_token(scope)
+    if path is None or token is None:
+        await send({"type": "websocket.close", "code": CLOSE_FORBIDDEN})
+        return
+    match_id = int(path["pk"])
+    user, allowed = await database_sync_to_async(authorize)(token, match_id)
+    if not allowed:
+        await send({"type": "websocket.close", "code": (
+            CLOSE_UNAUTHORIZED if user is None else CLOSE_FORBIDDEN)})
+        return
+
+    await send({"type": "websocket.accept"})
+    broker, writer = get_broker(), get_writer()
+    queue = await broker.subscribe(match_id)
+
+    async def forward():
+        while True:
+            message = await queue.get()
+            await send({"type": "websocket.send", "text": json.dumps(message)})
+
+    forwarder = asyncio.ensure_future(forward())
+    try:
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                break
+            if event["type"] != "websocket.receive":
+                continue
+            try:
+                message = json.loads(event.get("text") or "")["message"]
+            except (ValueError, TypeError, KeyError):
+                message = None
+            if (not isinstance(message, str) or not message.strip()
+                    or len(message) > MAX_LENGTH):
+                await send({"type": "websocket.send", "text": json.dumps({
+                    "error": "Expected {\"message\": \"...\"} with "
+                             f"1 to {MAX_LENGTH} characters."})})
+                continue
+            row = await writer.add(match_id, user.pk, message)
+            await broker.publish(
+                match_id, serializers.MatchChatModelSerializer(row).data)
+    finally:
+        forwarder.cancel()
+        await asyncio.gather(forwarder, return_exceptions=True)
+        await broker.unsubscribe(match_id, queue)
+        # The messages of a closed chat don't wait for the timer
+        await writer.flush()
@@ -0,0 +1,274 @@
+import asyncio
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as DecodeError
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.user.authentication import CachedTokenAuthentication
+from . import models, serializers
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_notifier = None
+
+
+class FeedNotifier:
+    """Wakes up the feed requests of users in this process when their
+    matches or messages change. Requests in other processes find the
+    changes with their next check after FEED_POLL_INTERVAL seconds.
+    """
+    def __init__(self):
+        self._waiters = defaultdict(set)
+        self._lock = Lock()
+
+    def register(self, user_id: int) -> tuple:
+        """Get a waiter of a user whose event is set on changes. Has to be
+        called in the event loop of the request."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[user_id].add(waiter)
+        return waiter
+
+    def unregister(self, user_id: int, waiter: tuple):
+        with self._lock:
+            waiters = self._waiters.get(user_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[user_id]
+
+    @property
+    def waiting(self) -> bool:
+        """Check if any request of this process waits for changes."""
+        return bool(self._waiters)
+
+    def notify(self, user_ids):
+        """Wake up the requests of users, from any thread."""
+        with self._lock:
+            waiters = [waiter for user_id in user_ids
+                       for waiter in self._waiters.get(user_id, ())]
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+
+def get_notifier() -> FeedNotifier:
+    """Get the notifier of this process."""
+    global _notifier
+    if _notifier is None:
+        _notifier = FeedNotifier()
+    return _notifier
+
+
+def notify_matches(match_ids):
+    """Wake up the feed requests of the users of matches. Only queries the
+    users if a request of this process is waiting.
+
+    Args:
+        match_ids (list): Ids of the changed matches.
+    """
+    notifier = get_notifier()
+    if not notifier.waiting:
+        return
+    users = (models.Match.objects
+             .filter(pk__in=match_ids)
+             .values_list("timeplace_1__user_id", "timeplace_2__user_id"))
+    notifier.notify({user_id for pair in users for user_id in pair})
+
+
+def to_microseconds(moment: datetime) -> int:
+    """Get the microseconds since 1970 of a time."""
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def encode_since(horizon: datetime, seen: dict) -> str:
+    """Get the token of a feed position.
+
+    Args:
+        horizon (datetime): All changes up to this time were returned.
+        seen (dict): Sets of the (id, modified_at in microseconds) of the
+            matches ("m") and messages ("c") after the horizon that were
+            returned.
+    """
+    base = to_microseconds(horizon)
+    position = {"h": base}
+    for kind, rows in seen.items():
+        if rows:
+            position[kind] = [[pk, modified - base]
+                              for pk, modified in sorted(rows)]
+    return b64encode(json.dumps(position, separators=(",", ":")).encode(),
+                     altchars=b"-_").decode()
+
+
+def decode_since(token: str) -> tuple:
+    """Get the horizon and the seen rows of a token, None if it's invalid."""
+    try:
+        position = json.loads(b64decode(token, altchars=b"-_", validate=True))
+        base = position["h"]
+        if not isinstance(base, int):
+            return None
+        horizon = EPOCH + timedelta(microseconds=base)
+        seen = {kind: {(pk, base + offset)
+                       for pk, offset in position.get(kind, ())}
+                for kind in ("m", "c")}
+        if not all(isinstance(value, int) for rows in seen.values()
+                   for row in rows for value in row):
+            return None
+    except (DecodeError, ValueError, TypeError, KeyError, AttributeError,
+            OverflowError):
+        return None
+    return horizon, seen
+
+
+def start_position() -> tuple:
+    """Get the position of a client that has everything up to now."""
+    return (datetime.now(timezone.utc)
+            - timedelta(seconds=settings.FEED_SAFETY_WINDOW)), {}
+
+
+def get_changes(request, since: tuple) -> tuple:
+    """Get the matches and messages of the request's user that changed
+    after a position, at most FEED_PAGE_SIZE of each.
+
+    A change can be committed a little after the time it's stamped with.
+    So the position doesn't end at the latest change but FEED_SAFETY_WINDOW
+    seconds before the query, and the changes after that which were
+    already returned are remembered in the token and skipped.
+
+    Args:
+        request (HttpRequest): The request with the authenticated user.
+        since (tuple): Horizon and seen rows of the client's token.
+
+    Returns:
+        tuple: The serialized matches and messages, the token of the
+            new position and whether there are more changes.
+    """
+    user, limit = request.user, settings.FEED_PAGE_SIZE
+    horizon, seen = since
+    stable = (datetime.now(timezone.utc)
+              - timedelta(seconds=settings.FEED_SAFETY_WINDOW))
+    match_ids = list(models.Match.objects
+                     .filter(Q(timeplace_1__user=user)
+                             | Q(timeplace_2__user=user))
+                     .values_list("pk", flat=True))
+    querysets = {
+        "m": serializers.MatchModelListRetrieveSerializer.setup_eager_loading(
+            models.Match.objects.filter(pk__in=match_ids,
+                                        modified_at__gt=horizon), user),
+        "c": models.MatchChat.objects.filter(match_id__in=match_ids,
+                                             modified_at__gt=horizon),
+    }
+    changes, more, cutoff = {}, False, None
+    for kind, queryset in querysets.items():
+        known = seen.get(kind, set())
+        # One row more than the page tells if there are more changes
+        rows = queryset.order_by("modified_at", "id")[:limit + len(known) + 1]
+        rows = [row for row in rows
+                if (row.pk, to_microseconds(row.modified_at)) not in known]
+        if len(rows) > limit:
+            more = True
+            last = rows[limit - 1].modified_at
+            cutoff = last if cutoff is None else min(cutoff, last)
+        changes[kind] = rows[:limit]
+
+    if more:
+        # Both lists end at the same time. Rows of that time that didn't
+        # fit are still after the new horizon.
+        for kind, rows in changes.items():
+            changes[kind] = [row for row in rows if row.modified_at <= cutoff]
+        stable = min(stable, cutoff - timedelta(microseconds=1))
+    horizon = max(horizon, stable)
+    base = to_microseconds(horizon)
+    seen = {kind: {row for row in seen.get(kind, ()) if row[1] > base}
+            | {(row.pk, to_microseconds(row.modified_at)) for row in rows
+               if row.modified_at > horizon}
+            for kind, rows in changes.items()}
+
+    context = {"request": request}
+    return (
+        serializers.MatchModelListRetrieveSerializer(
+            changes["m"], many=True, context=context).data,
+        serializers.MatchChatModelSerializer(changes["c"], many=True).data,
+        encode_since(horizon, seen),
+        more,
+    )
+
+
+def authenticate(request):
+    """Authenticate a request with its API token, None if it has none or
+    an invalid one."""
+    try:
+        result = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def feed(request):
+    """Long-polling feed of the matches and chat messages of the user.
+
+    Without 'since' only the token of the current time is returned. With
+    'since=<token>' the matches and messages that were created or changed
+    after the token are returned right away if there are any. Otherwise
+    the request waits until there are, or 'timeout' seconds (at most
+    FEED_TIMEOUT) have passed. Every response has the token for the next
+    request in 'since' and 'more' if the changes didn't fit. A change of
+    the last FEED_SAFETY_WINDOW seconds can be returned again after a new
+    token, clients replace matches and messages by their id.
+
+    The wait doesn't block a thread when the app is served with ASGI.
+    """
+    # require_GET doesn't support async views before Django 5.0
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=401)
+    request.user = user
+
+    token = request.GET.get("since")
+    if token is None:
+        return JsonResponse({"since": encode_since(*start_position()),
+                             "more": False, "matches": [], "messages": []})
+    since = decode_since(token)
+    try:
+        timeout = float(request.GET.get("timeout", settings.FEED_TIMEOUT))
+        timeout = max(0, min(timeout, settings.FEED_TIMEOUT))
+    except ValueError:
+        since = None
+    if since is None:
+        return JsonResponse({"detail": "Invalid 'since' or 'timeout'."},
+                            status=400)
+
+    notifier = get_notifier()
+    waiter = notifier.register(user.pk)
+    deadline = monotonic() + timeout
+    try:
+        while True:
+            waiter[1].clear()
+            matches, messages, token, more = await sync_to_async(
+                get_changes)(request, since)
+            remaining = deadline - monotonic()
+            if matches or messages or remaining <= 0:
+                break
+            try:
+                # Changes of other processes are found by checking again
+                await asyncio.wait_for(
+                    waiter[1].wait(),
+                    min(remaining, settings.FEED_POLL_INTERVAL))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        notifier.unregister(user.pk, waiter)
+    return JsonResponse({"since": token, "more": more,
+                         "matches": matches, "messages": messages})
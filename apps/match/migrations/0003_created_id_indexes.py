@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0002_alter_match_chat_accepted_alter_match_email_user_1_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['-created_at', '-id'], name='match_created_idx'),
+        ),
+    ]
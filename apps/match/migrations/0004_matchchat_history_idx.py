@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0003_created_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchchat',
+            index=models.Index(fields=['match_id', '-created_at', '-id'], name='matchchat_history_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0004_matchchat_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['modified_at'], name='match_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchchat',
+            index=models.Index(fields=['match_id', 'modified_at'], name='matchchat_modified_idx'),
+        ),
+    ]
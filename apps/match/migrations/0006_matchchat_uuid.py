@@ -0,0 +1,39 @@
+import uuid
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_uuids(apps, schema_editor):
+    MatchChat = apps.get_model("match", "MatchChat")
+    messages = list(MatchChat.objects.only("pk"))
+    for message in messages:
+        message.uuid = uuid.uuid4()
+    MatchChat.objects.bulk_update(messages, ["uuid"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0005_modified_indexes'),
+    ]
+
+    operations = [
+        # Every existing message needs its own uuid before it's unique
+        migrations.AddField(
+            model_name='matchchat',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_uuids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='matchchat',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='matchchat',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
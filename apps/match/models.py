@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 
 from apps.user.models import User
 from apps.timeplace.models import TimePlace
@@ -20,6 +23,20 @@ class Match(CreatedModifiedDateTimeBase, SoftDelete):
     phone_user_2 = models.BooleanField(default=False)
     chat_accepted = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Matches and chats, newest first
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="match_created_idx",
+            ),
+            # Changed matches of the feed
+            models.Index(
+                fields=["modified_at"],
+                name="match_modified_idx",
+            ),
+        ]
+
 
 class MatchChat(CreatedModifiedDateTimeBase):
     """Model to store the chat between users"""
@@ -27,3 +44,22 @@ class MatchChat(CreatedModifiedDateTimeBase):
     match_id = models.ForeignKey("match.Match", on_delete=models.CASCADE)
     user_id = models.ForeignKey("user.User", on_delete=models.CASCADE)
     message = models.TextField(max_length=500)
+    # The WebSocket chats publish a message before it's saved, clients
+    # match it to the saved one by this id
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # The time the message was sent, it's saved later in a batch
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Chat history of a match, newest first
+            models.Index(
+                fields=["match_id", "-created_at", "-id"],
+                name="matchchat_history_idx",
+            ),
+            # Changed messages of the feed
+            models.Index(
+                fields=["match_id", "modified_at"],
+                name="matchchat_modified_idx",
+            ),
+        ]
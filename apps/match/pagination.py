@@ -0,0 +1,170 @@
+from base64 import b64decode, b64encode
+from binascii import Error as DecodeError
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import feed
+
+
+def encode_position(message) -> str:
+    """Get the cursor of a chat message, its creation time and id."""
+    position = f"{message.created_at.isoformat()}|{message.pk}"
+    return b64encode(position.encode(), altchars=b"-_").decode()
+
+
+def decode_position(cursor: str) -> tuple:
+    """Get the creation time and id of a cursor, NotFound if it's invalid."""
+    try:
+        position = b64decode(cursor, altchars=b"-_", validate=True).decode()
+        created_at, pk = position.split("|")
+        created_at, pk = parse_datetime(created_at), int(pk)
+    except (DecodeError, UnicodeDecodeError, ValueError):
+        created_at = None
+    if created_at is None:
+        raise NotFound("Invalid cursor")
+    return created_at, pk
+
+
+class ChatHistoryPagination(BasePagination):
+    """Keyset pagination of the chat messages of a match by (created_at, id),
+    backed by the (match_id, created_at, id) index, so every page is one
+    index range scan no matter how long the chat is.
+
+    Without parameters the newest messages are returned, newest first, with
+    a link to the older ones in 'next' and a token for the messages after
+    them in 'latest'. With 'since=<token>' the messages saved after that
+    token are returned, in the order they were saved, with the token to
+    continue from in 'since' and whether there are more in 'more'. An
+    empty 'since' starts at the first message.
+
+    The WebSocket chats save their messages in batches, so a message can
+    be saved well after it was published and sent. The tokens follow the
+    time the messages were saved, like the feed's, and look back
+    FEED_SAFETY_WINDOW seconds, so a message can be returned twice.
+    Reconnecting clients pass their last token and merge the result with
+    the messages they got over the WebSocket by 'uuid'.
+    """
+    before_query_param = "before"
+    since_query_param = "since"
+
+    def get_page_size(self, request) -> int:
+        return settings.CHAT_HISTORY_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.delta = self.since_query_param in request.query_params
+        if self.delta:
+            return self.paginate_since(queryset, request, page_size)
+
+        before = request.query_params.get(self.before_query_param)
+        if before:
+            created_at, pk = decode_position(before)
+            # The first condition bounds the index range
+            queryset = queryset.filter(
+                Q(created_at__lte=created_at)
+                & (Q(created_at__lt=created_at) | Q(pk__lt=pk)))
+        queryset = queryset.order_by("-created_at", "-id")
+
+        # One row more tells if there are more messages
+        messages = list(queryset[:page_size + 1])
+        self.more = len(messages) > page_size
+        self.page = messages[:page_size]
+        self.latest = None
+        if not before:
+            # The messages of this page don't have to be returned again
+            horizon, _ = feed.start_position()
+            self.latest = feed.encode_since(horizon, {"c": {
+                (message.pk, feed.to_microseconds(message.modified_at))
+                for message in self.page if message.modified_at > horizon}})
+        return self.page
+
+    def paginate_since(self, queryset, request, page_size) -> list:
+        """Get the messages saved after a token, see feed.get_changes."""
+        token = request.query_params[self.since_query_param]
+        if token:
+            position = feed.decode_since(token)
+            if position is None:
+                raise NotFound("Invalid cursor")
+            horizon, seen = position[0], position[1]["c"]
+        else:
+            horizon, seen = feed.EPOCH, set()
+        stable = (datetime.now(timezone.utc)
+                  - timedelta(seconds=settings.FEED_SAFETY_WINDOW))
+
+        # The messages the client already has are skipped, one more row
+        # tells if there are more messages
+        messages = (queryset.filter(modified_at__gt=horizon)
+                    .order_by("modified_at", "id")
+                    [:page_size + len(seen) + 1])
+        messages = [message for message in messages
+                    if (message.pk, feed.to_microseconds(message.modified_at))
+                    not in seen]
+        self.more = len(messages) > page_size
+        self.page = messages[:page_size]
+        if self.more:
+            # Messages of the last time that didn't fit come next time
+            stable = min(stable, self.page[-1].modified_at
+                         - timedelta(microseconds=1))
+        horizon = max(horizon, stable)
+        base = feed.to_microseconds(horizon)
+        seen = {row for row in seen if row[1] > base} | {
+            (message.pk, feed.to_microseconds(message.modified_at))
+            for message in self.page if message.modified_at > horizon}
+        self.since = feed.encode_since(horizon, {"c": seen})
+        return self.page
+
+    def get_next_link(self):
+        if not self.more:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.before_query_param,
+                                   encode_position(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        if self.delta:
+            return Response({
+                "since": self.since,
+                "more": self.more,
+                "results": data,
+            })
+        return Response({
+            "next": self.get_next_link(),
+            "latest": self.latest,
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "latest": {"type": "string", "nullable": True},
+                "since": {"type": "string"},
+                "more": {"type": "boolean"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            "name": self.before_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Cursor of the 'next' link, for older messages.",
+            "schema": {"type": "string"},
+        }, {
+            "name": self.since_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Token of the last response, for the "
+                           "messages saved after it.",
+            "schema": {"type": "string"},
+        }]
@@ -1,7 +1,9 @@
+from django.db.models import BooleanField, ExpressionWrapper, Q
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field, extend_schema_serializer
 from drf_spectacular.utils import OpenApiTypes, OpenApiExample
 
+from apps.core.serializers import CompiledReadMixin
 from apps.timeplace import serializers as tp_serializers
 from . import models
 
@@ -56,7 +58,8 @@ from . import models
         ),
     ]
 )
-class MatchModelListRetrieveSerializer(serializers.ModelSerializer):
+class MatchModelListRetrieveSerializer(CompiledReadMixin,
+                                       serializers.ModelSerializer):
     """Serializer for listing and retrieving matches"""
 
     own_timeplace = serializers.SerializerMethodField()
@@ -74,27 +77,61 @@ class MatchModelListRetrieveSerializer(serializers.ModelSerializer):
             "chat_accepted",
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset, user):
+        """Load everything the serializer reads with the matches, so a page
+        of matches needs the same number of queries regardless of its size.
+        The side of the user is annotated as 'is_side_1'.
+        """
+        return (queryset
+                .select_related("timeplace_1__user__userprofile",
+                                "timeplace_2__user__userprofile")
+                .prefetch_related("timeplace_1__interests",
+                                  "timeplace_1__activities",
+                                  "timeplace_2__interests",
+                                  "timeplace_2__activities")
+                .annotate(is_side_1=ExpressionWrapper(
+                    Q(timeplace_1__user=user), output_field=BooleanField()))
+                )
+
+    def is_side_1(self, obj) -> bool:
+        """Check if the user of the request owns timeplace_1 of the match.
+        Uses the annotation of setup_eager_loading if there is one.
+        """
+        if not hasattr(obj, "is_side_1"):
+            obj.is_side_1 = (obj.timeplace_1.user_id
+                             == self.context['request'].user.id)
+        return obj.is_side_1
+
+    def timeplace_data(self, timeplace):
+        """Serialize a timeplace of the match. The nested serializer is
+        created once and reused for every match."""
+        if not hasattr(self, "_timeplace_serializer"):
+            self._timeplace_serializer = (
+                tp_serializers.TimePlaceMatchSerializer())
+        return self._timeplace_serializer.to_representation(timeplace)
+
     @extend_schema_field(OpenApiTypes.OBJECT)    
     def get_own_timeplace(self, obj):
         """Returns the users own timeplace"""
 
-        if obj.timeplace_1.user == self.context['request'].user:
-            return tp_serializers.TimePlaceMatchSerializer(obj.timeplace_1).data
-        return tp_serializers.TimePlaceMatchSerializer(obj.timeplace_2).data
+        if self.is_side_1(obj):
+            return self.timeplace_data(obj.timeplace_1)
+        return self.timeplace_data(obj.timeplace_2)
 
     @extend_schema_field(OpenApiTypes.OBJECT)    
     def get_foreign_timeplace(self, obj):
         """Returns the timeplace of the matched user"""
 
-        if obj.timeplace_1.user == self.context['request'].user:
-            return tp_serializers.TimePlaceMatchSerializer(obj.timeplace_2).data
-        return tp_serializers.TimePlaceMatchSerializer(obj.timeplace_1).data
+        if self.is_side_1(obj):
+            return self.timeplace_data(obj.timeplace_2)
+        return self.timeplace_data(obj.timeplace_1)
 
     @extend_schema_field(OpenApiTypes.EMAIL)    
     def get_foreign_email(self, obj):
         """Returns the email of the matched user"""
 
-        if obj.timeplace_1.user == self.context['request'].user:
+        if self.is_side_1(obj):
             if obj.email_user_2:
                 return obj.timeplace_2.user.userprofile.profile_email
             else:
@@ -108,7 +145,7 @@ class MatchModelListRetrieveSerializer(serializers.ModelSerializer):
     def get_foreign_phone(self, obj):
         """Returns the phone number of the matched user"""
 
-        if obj.timeplace_1.user == self.context['request'].user:
+        if self.is_side_1(obj):
             if obj.phone_user_2:
                 return obj.timeplace_2.user.userprofile.phone
             else:
@@ -125,7 +162,9 @@ class MatchChatModelSerializer(serializers.ModelSerializer):
         model = models.MatchChat
         fields = [
             "id",
+            "uuid",
             "match_id",
             "user_id",
             "message",
+            "created_at",
         ]
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import feed, models
+
+
+@receiver(post_save, sender=models.Match)
+def match_changed(sender, instance, raw=False, **kwargs):
+    """Wake up the feed requests of the users of a created or changed
+    match once it is committed.
+    """
+    if raw or not feed.get_notifier().waiting:
+        return
+    transaction.on_commit(lambda: feed.notify_matches([instance.pk]))
+
+
+@receiver(post_save, sender=models.MatchChat)
+def message_saved(sender, instance, raw=False, **kwargs):
+    """Wake up the feed requests of the users of a match with a new
+    message. The messages of the WebSocket chats are saved in bulk and
+    notify in ChatWriter.flush.
+    """
+    if raw or not feed.get_notifier().waiting:
+        return
+    transaction.on_commit(lambda: feed.notify_matches([instance.match_id_id]))
@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -6,6 +8,7 @@ from rest_framework.test import APITestCase
 from apps.timeplace import models
 from apps.user import models as usermodels
 from apps.match import models
+from apps.match.serializers import MatchModelListRetrieveSerializer
 
 class TestMatchEndpoints(APITestCase):
     """ Tests for the match endpoints """
@@ -186,4 +189,159 @@ class TestMatchEndpoints(APITestCase):
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.user2token.key)
         response = self.client.get(url)
         self.assertFalse(response.data['chat_accepted'])
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class TestMatchQueryCount(APITestCase):
+    """The match endpoints need a fixed number of queries, no matter how
+    many matches are listed.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = usermodels.User.objects.create_user(
+            username="main_user",
+            email="main@stsp.com",
+            password="user@2023",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        usermodels.UserProfile.objects.create(
+            user = cls.user,
+            name = "main",
+            hometown = "maintown",
+            slogan = "mainslogan",
+            birthday = "2001-01-01",
+            gender = "D",
+            phone = "111111111",
+            profile_email = "main@stsp.com",
+        )
+        cls.tp = models.TimePlace.objects.create(
+            user=cls.user,
+            start="2025-12-01T12:00+01:00",
+            end="2025-12-01T15:00+01:00",
+            latitude=10.123456,
+            longitude=10.123456,
+            radius=10,
+            description="I want to count queries",
+        )
+        cls.tp.interests.add(1, 2)
+        cls.tp.activities.add(1, 2)
+
+    def add_matches(self, count):
+        """Create users with a timeplace that is matched with self.tp."""
+        offset = usermodels.User.objects.count()
+        for i in range(offset, offset + count):
+            user = usermodels.User.objects.create_user(
+                username=f"matched_{i}",
+                email=f"matched{i}@stsp.com",
+                password="user@2023",
+            )
+            usermodels.UserProfile.objects.create(
+                user = user,
+                name = f"matched{i}",
+                hometown = "matchedtown",
+                slogan = "matchedslogan",
+                birthday = "2001-01-01",
+                gender = "D",
+                phone = "111111111",
+                profile_email = f"matched{i}@stsp.com",
+            )
+            tp = models.TimePlace.objects.create(
+                user=user,
+                start="2025-12-01T13:00+01:00",
+                end="2025-12-01T17:00+01:00",
+                latitude=10.123456,
+                longitude=10.123456,
+                radius=10,
+                description=f"I am matched {i}",
+            )
+            tp.interests.add(1)
+            tp.activities.add(2)
+            models.Match.objects.create(
+                timeplace_1 = self.tp if i % 2 else tp,
+                timeplace_2 = tp if i % 2 else self.tp,
+                email_user_1 = True,
+                phone_user_2 = True,
+            )
+
+    def assert_query_count(self, url, expected):
+        """Request the url with 1 and 20 matches and check the number of
+        queries."""
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        for count in (1, 19):
+            self.add_matches(count)
+            # loads the cached token and the interest and activity catalogs
+            self.client.get(url)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_list_query_count(self):
+        """Test if listing the matches needs the same number of queries
+        for 1 and 20 matches.
+        """
+        # count, page, interests and activities of both timeplaces
+        response = self.assert_query_count(reverse("match-list"), 6)
+        self.assertEqual(response.data["count"], 20)
+        for match in response.data["results"]:
+            self.assertEqual(match["own_timeplace"]["id"], self.tp.id)
+            self.assertEqual(match["own_timeplace"]["username"], "main")
+            self.assertEqual(len(match["foreign_timeplace"]["interests"]), 1)
+
+    def test_foreign_contact_follows_side(self):
+        """Test if the shared contact details of the other user are shown
+        on both sides of a match.
+        """
+        self.add_matches(2)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        response = self.client.get(reverse("match-list"))
+        for match in response.data["results"]:
+            foreign = models.TimePlace.objects.get(
+                pk=match["foreign_timeplace"]["id"])
+            profile = foreign.user.userprofile
+            if models.Match.objects.filter(
+                    pk=match["id"], timeplace_1=self.tp).exists():
+                # the other user shared the phone number, not the email
+                self.assertEqual(match["foreign_phone"], profile.phone)
+                self.assertIsNone(match["foreign_email"])
+            else:
+                self.assertEqual(match["foreign_email"],
+                                 profile.profile_email)
+                self.assertIsNone(match["foreign_phone"])
+
+    def test_serializer_without_annotation(self):
+        """Test if the serializer finds the side of the user without the
+        annotation of the viewsets.
+        """
+        self.add_matches(2)
+        request = mock.Mock(user=self.user)
+        data = MatchModelListRetrieveSerializer(
+            models.Match.objects.all(), many=True,
+            context={"request": request}).data
+        for match in data:
+            self.assertEqual(match["own_timeplace"]["id"], self.tp.id)
+
+    def test_retrieve_query_count(self):
+        """Test if retrieving a match doesn't load its relations one by one.
+        """
+        self.add_matches(1)
+        match = models.Match.objects.get()
+        url = reverse("match-detail", args=(match.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        # loads the cached token and the catalogs
+        self.client.get(url)
+        # match, interests and activities of both timeplaces
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["foreign_timeplace"]["username"],
+                         match.timeplace_2.user.userprofile.name)
+
+    def test_chats_query_count(self):
+        """Test if the chats of a timeplace need the same number of queries
+        for 1 and 20 matches.
+        """
+        # timeplace with its interests and activities, count, page,
+        # interests and activities of both timeplaces
+        response = self.assert_query_count(
+            reverse("timeplace-chats", args=(self.tp.id,)), 9)
+        self.assertEqual(response.data["count"], 20)
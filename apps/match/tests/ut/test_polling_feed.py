@@ -0,0 +1,153 @@
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.match import feed, models
+
+from .test_websocket_chat import create_match
+
+
+class TestPollingFeed(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_match(cls)
+        # Older than the look back of new tokens
+        models.Match.objects.update(
+            modified_at=cls.match.modified_at - timedelta(minutes=1))
+
+    def setUp(self):
+        self.url = reverse("feed")
+
+    async def get(self, user=0, **params):
+        response = await self.async_client.get(
+            self.url, params,
+            headers={"authorization": "Token " + self.tokens[user]})
+        return response.status_code, response.json()
+
+    @sync_to_async
+    def say(self, message, user=0):
+        # Runs the callbacks of the signals like a commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return models.MatchChat.objects.create(
+                match_id=self.match, user_id=self.users[user],
+                message=message)
+
+    @sync_to_async
+    def stamp(self, message, seconds):
+        """Move the modification time of a message by some seconds."""
+        models.MatchChat.objects.filter(pk=message.pk).update(
+            modified_at=message.modified_at + timedelta(seconds=seconds))
+
+    async def test_feed_requires_token(self):
+        """Test if requests without a valid token are refused.
+        """
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        status, _ = await self.get(since="not a token")
+        self.assertEqual(status, 400)
+
+    async def test_changes_since_token(self):
+        """Test if only the changes after the token are returned, to the
+        users of the match, who have no profiles yet.
+        """
+        status, data = await self.get()
+        self.assertEqual(status, 200)
+        self.assertEqual(data["messages"], [])
+        since = data["since"]
+
+        await self.say("Hello")
+        self.match.chat_accepted = True
+        await sync_to_async(self.match.save)()
+
+        status, data = await self.get(since=since, timeout=0)
+        self.assertEqual([match["id"] for match in data["matches"]],
+                         [self.match.id])
+        self.assertTrue(data["matches"][0]["chat_accepted"])
+        self.assertEqual([message["message"] for message in data["messages"]],
+                         ["Hello"])
+        self.assertFalse(data["more"])
+
+        _, other = await self.get(user=2, since=since, timeout=0)
+        self.assertEqual((other["matches"], other["messages"]), ([], []))
+
+        _, data = await self.get(since=data["since"], timeout=0)
+        self.assertEqual((data["matches"], data["messages"]), ([], []))
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    async def test_changes_are_paged(self):
+        """Test if the changes that don't fit are returned by the next
+        request.
+        """
+        _, data = await self.get()
+        for i in range(3):
+            await self.say(f"Message {i}")
+        _, data = await self.get(since=data["since"], timeout=0)
+        self.assertEqual([message["message"] for message in data["messages"]],
+                         ["Message 0", "Message 1"])
+        self.assertTrue(data["more"])
+        _, data = await self.get(since=data["since"], timeout=0)
+        self.assertEqual([message["message"] for message in data["messages"]],
+                         ["Message 2"])
+        self.assertFalse(data["more"])
+
+    @override_settings(FEED_POLL_INTERVAL=10)
+    async def test_waiting_request_is_woken_up(self):
+        """Test if a waiting request returns as soon as a message of the
+        user's match is saved, and without changes after the timeout.
+        """
+        _, data = await self.get()
+        since = data["since"]
+        _, data = await self.get(since=since, timeout=0.1)
+        self.assertEqual(data["messages"], [])
+
+        request = asyncio.ensure_future(self.get(user=1, since=since,
+                                                 timeout=5))
+        while not feed.get_notifier().waiting:
+            await asyncio.sleep(0.01)
+        # Woken up by the signal of the message
+        await self.say("Are you there?")
+        _, data = await asyncio.wait_for(request, 2)
+        self.assertEqual([message["message"] for message in data["messages"]],
+                         ["Are you there?"])
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    async def test_changes_of_the_same_time(self):
+        """Test if changes with the same modification time are paged
+        without losing the ones that didn't fit.
+        """
+        _, data = await self.get()
+        for i in range(5):
+            await self.say(f"Message {i}")
+
+        @sync_to_async
+        def same_time():
+            modified_at = models.MatchChat.objects.earliest("id").modified_at
+            models.MatchChat.objects.update(modified_at=modified_at)
+        await same_time()
+
+        messages, more = [], True
+        while more:
+            _, data = await self.get(since=data["since"], timeout=0)
+            messages += [message["message"] for message in data["messages"]]
+            more = data["more"]
+        self.assertEqual(messages, [f"Message {i}" for i in range(5)])
+
+    async def test_late_commits_are_returned(self):
+        """Test if a change that is stamped before the previous response but
+        committed after it is still returned, and only once.
+        """
+        _, data = await self.get()
+        await self.say("Early")
+        _, data = await self.get(since=data["since"], timeout=0)
+        self.assertEqual(len(data["messages"]), 1)
+
+        # Stamped a second before the response, committed now
+        await self.stamp(await self.say("Late"), -1)
+        _, data = await self.get(since=data["since"], timeout=0)
+        self.assertEqual([message["message"] for message in data["messages"]],
+                         ["Late"])
+        _, data = await self.get(since=data["since"], timeout=0)
+        self.assertEqual(data["messages"], [])
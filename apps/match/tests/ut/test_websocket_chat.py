@@ -0,0 +1,371 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from apps.core.utils import database_sync_to_async
+from apps.match import chat, models, serializers
+from apps.timeplace.models import TimePlace
+from apps.user.models import User
+
+
+def create_match(cls):
+    """Create three users with tokens and a match of the first two."""
+    cls.users = [User.objects.create_user(
+        username=f"user_chat_{i}",
+        email=f"user_chat_{i}@stsp.com",
+        password="user@2023",
+    ) for i in range(3)]
+    cls.tokens = [Token.objects.create(user=user).key for user in cls.users]
+    timeplaces = [TimePlace.objects.create(
+        user=user,
+        start="2025-12-01T12:00+01:00",
+        end="2025-12-01T15:00+01:00",
+        latitude=52.52,
+        longitude=13.40,
+        radius=10,
+        description="Chatting",
+    ) for user in cls.users[:2]]
+    cls.match = models.Match.objects.create(
+        timeplace_1=timeplaces[0], timeplace_2=timeplaces[1])
+
+
+class TestWebSocketChat(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_match(cls)
+
+    def setUp(self):
+        # Every test gets its own broker and writer
+        chat._broker = chat._writer = None
+        self.addCleanup(setattr, chat, "_broker", None)
+        self.addCleanup(setattr, chat, "_writer", None)
+
+    async def connect(self, token, match_id=None):
+        communicator = ApplicationCommunicator(chat.chat_application, {
+            "type": "websocket",
+            "path": f"/ws/v1/match/{match_id or self.match.id}/chat/",
+            "query_string": f"token={token}".encode(),
+            "headers": [],
+        })
+        await communicator.send_input({"type": "websocket.connect"})
+        return communicator, await communicator.receive_output()
+
+    async def say(self, communicator, message):
+        await communicator.send_input({
+            "type": "websocket.receive",
+            "text": json.dumps({"message": message}),
+        })
+
+    async def receive(self, communicator):
+        return json.loads((await communicator.receive_output())["text"])
+
+    async def count_messages(self):
+        return await sync_to_async(
+            models.MatchChat.objects.filter(match_id=self.match).count)()
+
+    async def test_members_receive_messages(self):
+        """Test if a message reaches all connections of the match and is
+        saved once the chat is closed, with one authorization per
+        connection.
+        """
+        published = []
+        with mock.patch.object(chat, "authorize",
+                               wraps=chat.authorize) as authorize:
+            first, event = await self.connect(self.tokens[0])
+            self.assertEqual(event, {"type": "websocket.accept"})
+            second, event = await self.connect(self.tokens[1])
+            self.assertEqual(event, {"type": "websocket.accept"})
+
+            for text in ("Hi", "Where are you?"):
+                await self.say(first, text)
+                for communicator in (first, second):
+                    message = await self.receive(communicator)
+                    self.assertEqual(message["message"], text)
+                    self.assertEqual(message["user_id"], self.users[0].id)
+                published.append(message)
+            await self.say(second, "At the station")
+            message = await self.receive(first)
+            self.assertEqual(message["user_id"], self.users[1].id)
+            published.append(message)
+        self.assertEqual(authorize.call_count, 2)
+
+        # The messages wait for the next batch
+        self.assertEqual(await self.count_messages(), 0)
+        self.assertIsNone(published[0]["id"])
+        await first.send_input({"type": "websocket.disconnect", "code": 1000})
+        await first.wait()
+        self.assertEqual(await self.count_messages(), 3)
+
+        # The history has the published messages with their uuid and time
+        history = await sync_to_async(lambda: [
+            serializers.MatchChatModelSerializer(row).data
+            for row in models.MatchChat.objects.order_by("created_at")])()
+        self.assertEqual(
+            [{**row, "id": None} for row in history], published)
+        await second.send_input({"type": "websocket.disconnect", "code": 1000})
+        await second.wait()
+
+    @override_settings(CHAT_FLUSH_SIZE=2)
+    async def test_messages_are_saved_in_batches(self):
+        """Test if the messages are saved whenever a batch is full and
+        invalid messages are refused.
+        """
+        communicator, _ = await self.connect(self.tokens[0])
+        await self.say(communicator, "One")
+        await self.receive(communicator)
+        self.assertEqual(await self.count_messages(), 0)
+        await self.say(communicator, "Two")
+        await self.receive(communicator)
+        self.assertEqual(await self.count_messages(), 2)
+
+        await self.say(communicator, "x" * 501)
+        self.assertIn("error", await self.receive(communicator))
+        await communicator.send_input({"type": "websocket.receive",
+                                       "text": "no json"})
+        self.assertIn("error", await self.receive(communicator))
+
+        await self.say(communicator, "Three")
+        await self.receive(communicator)
+        await communicator.send_input({"type": "websocket.disconnect",
+                                       "code": 1000})
+        await communicator.wait()
+        self.assertEqual(await self.count_messages(), 3)
+
+    async def test_others_are_refused(self):
+        """Test if users outside of the match and invalid tokens can't
+        connect.
+        """
+        _, event = await self.connect(self.tokens[2])
+        self.assertEqual(event, {"type": "websocket.close",
+                                 "code": chat.CLOSE_FORBIDDEN})
+        _, event = await self.connect("invalid")
+        self.assertEqual(event, {"type": "websocket.close",
+                                 "code": chat.CLOSE_UNAUTHORIZED})
+        _, event = await self.connect(self.tokens[0], match_id=99999)
+        self.assertEqual(event, {"type": "websocket.close",
+                                 "code": chat.CLOSE_FORBIDDEN})
+
+
+class TestChatWriter(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_match(cls)
+
+    def bulk_create(self, refused="", fail=0):
+        """Patch the insert of the messages to refuse a message or to fail
+        a number of times."""
+        insert = models.MatchChat.objects.bulk_create
+        calls = []
+
+        def bulk_create(rows):
+            calls.append(len(rows))
+            if len(calls) <= fail:
+                raise OperationalError("connection lost")
+            if any(row.message == refused for row in rows):
+                raise IntegrityError("refused")
+            return insert(rows)
+        patcher = mock.patch.object(models.MatchChat.objects, "bulk_create",
+                                    side_effect=bulk_create)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    async def add(self, writer, *messages):
+        for message in messages:
+            await writer.add(self.match.id, self.users[0].id, message)
+
+    async def saved_messages(self):
+        return await sync_to_async(list)(
+            models.MatchChat.objects.filter(match_id=self.match)
+            .order_by("id").values_list("message", flat=True))
+
+    async def test_refused_messages_are_dropped_alone(self):
+        """Test if a refused message doesn't take the rest of its batch
+        with it.
+        """
+        calls = self.bulk_create(refused="bad")
+        writer = chat.ChatWriter()
+        with self.assertLogs(chat.logger, "ERROR"):
+            await self.add(writer, "One", "bad", "Two")
+            await writer.flush()
+        self.assertEqual(await self.saved_messages(), ["One", "Two"])
+        self.assertEqual(calls, [3, 1, 1, 1])
+
+    @override_settings(CHAT_FLUSH_INTERVAL=0.01)
+    async def test_messages_are_kept_when_the_database_fails(self):
+        """Test if the messages of a failed insert are saved by the next
+        try after the interval.
+        """
+        self.bulk_create(fail=1)
+        writer = chat.ChatWriter()
+        await self.add(writer, "One", "Two")
+        with self.assertLogs(chat.logger, "ERROR"):
+            await writer.flush()
+        self.assertEqual(await self.saved_messages(), [])
+        for _ in range(100):
+            if not writer._rows:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*writer._tasks)
+        self.assertEqual(await self.saved_messages(), ["One", "Two"])
+
+    @override_settings(CHAT_FLUSH_INTERVAL=60, CHAT_MAX_PENDING=3)
+    async def test_unsaved_messages_are_limited(self):
+        """Test if only the newest CHAT_MAX_PENDING messages are kept while
+        the database fails.
+        """
+        self.bulk_create(fail=2)
+        writer = chat.ChatWriter()
+        with self.assertLogs(chat.logger, "ERROR"):
+            await self.add(writer, "One", "Two")
+            await writer.flush()
+            await self.add(writer, "Three", "Four")
+            await writer.flush()
+        self.assertEqual([row.message for row in writer._rows],
+                         ["Two", "Three", "Four"])
+        await writer.flush()
+        self.assertEqual(await self.saved_messages(),
+                         ["Two", "Three", "Four"])
+
+    def test_broken_connections_are_replaced(self):
+        """Test if the connections are checked before and after every
+        database call of the WebSocket application, except in a
+        transaction.
+        """
+        with mock.patch.object(connection, "close_if_unusable_or_obsolete") \
+                as close:
+            async_to_sync(database_sync_to_async(lambda: None))()
+            self.assertEqual(close.call_count, 0)
+            with mock.patch.object(connection, "in_atomic_block", False):
+                async_to_sync(database_sync_to_async(lambda: None))()
+            self.assertEqual(close.call_count, 2)
+
+
+class TestChatHistory(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_match(cls)
+        models.MatchChat.objects.bulk_create(
+            models.MatchChat(match_id=cls.match, user_id=cls.users[i % 2],
+                             message=f"Message {i}") for i in range(3))
+        # Older than the look back of the tokens
+        models.MatchChat.objects.update(
+            modified_at=timezone.now() - timedelta(minutes=1))
+
+    def test_members_can_read_the_history(self):
+        """Test if the members of a match get its messages, newest first.
+        """
+        url = reverse("match-chat", args=(self.match.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.tokens[0])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]],
+                         ["Message 2", "Message 1", "Message 0"])
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.tokens[2])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(CHAT_HISTORY_PAGE_SIZE=2)
+    def test_history_pages(self):
+        """Test if the older messages are paged with the 'next' link and
+        only the first page has the cursor of the newest message.
+        """
+        url = reverse("match-chat", args=(self.match.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.tokens[1])
+        response = self.client.get(url)
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]],
+                         ["Message 2", "Message 1"])
+        self.assertIsNotNone(response.data["latest"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]],
+                         ["Message 0"])
+        self.assertIsNone(response.data["next"])
+        self.assertIsNone(response.data["latest"])
+
+    @override_settings(CHAT_HISTORY_PAGE_SIZE=2)
+    def test_messages_since_cursor(self):
+        """Test if a reconnecting client gets the messages saved after its
+        last token, oldest first.
+        """
+        url = reverse("match-chat", args=(self.match.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.tokens[0])
+        latest = self.client.get(url).data["latest"]
+        models.MatchChat.objects.bulk_create(
+            models.MatchChat(match_id=self.match, user_id=self.users[1],
+                             message=f"Message {i}") for i in range(3, 6))
+
+        response = self.client.get(url, {"since": latest})
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]],
+                         ["Message 3", "Message 4"])
+        self.assertTrue(response.data["more"])
+        response = self.client.get(url, {"since": response.data["since"]})
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]],
+                         ["Message 5"])
+        self.assertFalse(response.data["more"])
+        response = self.client.get(url, {"since": response.data["since"]})
+        self.assertEqual(response.data["results"], [])
+
+        response = self.client.get(url, {"since": ""})
+        self.assertEqual(response.data["results"][0]["message"], "Message 0")
+        response = self.client.get(url, {"since": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_late_commits_are_returned(self):
+        """Test if a message that is stamped before the previous response
+        but saved after it is still returned, and only once.
+        """
+        url = reverse("match-chat", args=(self.match.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.tokens[0])
+        since = self.client.get(url).data["latest"]
+        self.assertEqual(
+            self.client.get(url, {"since": since}).data["results"], [])
+        models.MatchChat.objects.create(match_id=self.match,
+                                        user_id=self.users[0], message="Early")
+        response = self.client.get(url, {"since": since})
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]], ["Early"])
+
+        # Sent and stamped a second before the response, saved now
+        late = models.MatchChat.objects.create(
+            match_id=self.match, user_id=self.users[1], message="Late")
+        models.MatchChat.objects.filter(pk=late.pk).update(
+            created_at=late.created_at - timedelta(seconds=1),
+            modified_at=late.modified_at - timedelta(seconds=1))
+        response = self.client.get(url, {"since": response.data["since"]})
+        self.assertEqual([message["message"]
+                          for message in response.data["results"]], ["Late"])
+        response = self.client.get(url, {"since": response.data["since"]})
+        self.assertEqual(response.data["results"], [])
+
+    @skipUnless(connection.vendor == "postgresql",
+                "EXPLAIN output of PostgreSQL")
+    def test_latest_messages_use_the_index(self):
+        """Test if the newest messages of a match are read with one index
+        scan and no sort.
+        """
+        with connection.cursor() as cursor:
+            # The table is too small for the planner to prefer the index
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+        plan = (models.MatchChat.objects.filter(match_id=self.match)
+                .order_by("-created_at", "-id")[:51].explain())
+        self.assertIn("matchchat_history_idx", plan)
+        self.assertNotIn("Sort", plan)
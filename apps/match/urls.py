@@ -2,7 +2,7 @@ from django.urls import path
 
 from rest_framework import routers
 
-from apps.match import views
+from apps.match import feed, views
 
 router = routers.SimpleRouter()
 
@@ -10,5 +10,6 @@ router.register("api/v1/match", views.MatchViewSet)
 
 
 urlpatterns = [
+    path("api/v1/feed/", feed.feed, name="feed"),
     *router.urls,
 ]
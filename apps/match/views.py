@@ -10,7 +10,9 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import OpenApiResponse
 
+from apps.core.pagination import KeysetPagination
 from . import models, serializers, permissions
+from .pagination import ChatHistoryPagination
 
 
 class MatchViewSet(
@@ -24,18 +26,24 @@ class MatchViewSet(
     queryset = models.Match.objects.all()
     permission_classes = [permissions.SuperOrAuthors]
     serializer_class = serializers.MatchModelListRetrieveSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Limit the queryset to the author, i.e the logged in user, 
         and non-deleted items for fetching/updating data. Superusers can see all items."""
         if self.request.user.is_superuser:
-            return models.Match.objects.all().order_by("-created_at")
-        return (models.Match.objects
-                .exclude(deleted=True)
-                .filter(Q(timeplace_1__user=self.request.user) |
-                        Q(timeplace_2__user=self.request.user))
-                .order_by("-created_at")
-                )
+            queryset = models.Match.objects.all().order_by("-created_at", "-id")
+        else:
+            queryset = (models.Match.objects
+                        .exclude(deleted=True)
+                        .filter(Q(timeplace_1__user=self.request.user) |
+                                Q(timeplace_2__user=self.request.user))
+                        .order_by("-created_at", "-id")
+                        )
+        if self.action in ("list", "retrieve"):
+            queryset = self.serializer_class.setup_eager_loading(
+                queryset, self.request.user)
+        return queryset
     
     def perform_destroy(self, instance):
         """Don't delete the instance but rather set 'deleted' to true
@@ -109,13 +117,16 @@ class MatchViewSet(
         else:
             return Response(status=status.HTTP_403_FORBIDDEN)
 
-    @action(detail=True, methods=["GET"], url_path="chat")
+    @extend_schema(
+        responses=serializers.MatchChatModelSerializer(many=True))
+    @action(detail=True, methods=["GET"], url_path="chat",
+            pagination_class=ChatHistoryPagination)
     def chat(self, request, *args, **kwargs):
-        match = models.MatchChat.objects.filter(match_id=self.get_object().id)
-        serializer = serializers.MatchChatModelSerializer(data=request.data)
-        if serializer.is_valid():
-            match.chat(serializer.validated_data["message"])
-            match.save()
-            return Response("success", status.HTTP_200_OK)
-        else:
-            return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        """View the chat history of a match, newest first, or the messages
+        since a cursor, see ChatHistoryPagination. New messages are sent
+        and received over the WebSocket ws/v1/match/<id>/chat/.
+        """
+        queryset = models.MatchChat.objects.filter(match_id=self.get_object())
+        page = self.paginate_queryset(queryset)
+        serializer = serializers.MatchChatModelSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
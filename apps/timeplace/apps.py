@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TimeplaceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.timeplace"
+
+    def ready(self):
+        # Keep the precomputed match candidates up to date
+        from . import signals  # noqa: F401
+        from .catalogs import ACTIVITIES, INTERESTS
+        INTERESTS.connect()
+        ACTIVITIES.connect()
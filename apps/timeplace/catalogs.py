@@ -0,0 +1,5 @@
+from apps.core.catalog import Catalog
+from . import models
+
+INTERESTS = Catalog(models.Interest)
+ACTIVITIES = Catalog(models.Activity)
@@ -0,0 +1,162 @@
+from math import asin, cos, degrees, floor, radians, sin, sqrt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Mean earth radius in km
+EARTH_RADIUS_KM = 6371.0088
+# Size of a grid cell in degrees, a cell is about 55km high.
+# With the maximum radius of 50km, a bounding box covers at most three rows.
+GRID_CELL_SIZE = 0.5
+GRID_ROWS = int(180 / GRID_CELL_SIZE)
+GRID_COLUMNS = int(360 / GRID_CELL_SIZE)
+
+
+def grid_row(lat: float) -> int:
+    """Get the row of the grid cell a latitude is in."""
+    return min(floor((lat + 90) / GRID_CELL_SIZE), GRID_ROWS - 1)
+
+
+def grid_column(long: float) -> int:
+    """Get the column of the grid cell a longitude is in."""
+    return floor((long + 180) / GRID_CELL_SIZE) % GRID_COLUMNS
+
+
+def grid_cell(lat: float, long: float) -> int:
+    """Get the number of the fixed lat/long grid cell of a coordinate.
+
+    Cells are numbered row by row, starting at the south pole and the
+    antimeridian, so the cells of one row form a continuous range.
+
+    Args:
+        lat (float): latitude
+        long (float): longitude
+
+    Returns:
+        int: Number of the grid cell.
+    """
+    return grid_row(float(lat)) * GRID_COLUMNS + grid_column(float(long))
+
+
+def bounding_box(lat: float, long: float, radius: float):
+    """Get the box around a coordinate that contains every point within
+    the radius. The width of the box takes into account that longitudes
+    get closer towards the poles.
+
+    Args:
+        lat (float): latitude
+        long (float): longitude
+        radius (float): radius in km
+
+    Returns:
+        tuple: Minimum and maximum latitude and a list of
+            (minimum, maximum) longitude ranges. There are two ranges if the
+            box crosses the antimeridian.
+    """
+    lat, long = float(lat), float(long)
+    angle = radius / EARTH_RADIUS_KM
+    lat_min = lat - degrees(angle)
+    lat_max = lat + degrees(angle)
+    # Boxes around the poles span all longitudes
+    if lat_min <= -90 or lat_max >= 90 or sin(angle) >= cos(radians(lat)):
+        return max(lat_min, -90), min(lat_max, 90), [(-180, 180)]
+
+    delta = degrees(asin(sin(angle) / cos(radians(lat))))
+    long_min = long - delta
+    long_max = long + delta
+    if long_min < -180:
+        long_ranges = [(long_min + 360, 180), (-180, long_max)]
+    elif long_max > 180:
+        long_ranges = [(long_min, 180), (-180, long_max - 360)]
+    else:
+        long_ranges = [(long_min, long_max)]
+    return lat_min, lat_max, long_ranges
+
+
+def cell_ranges(lat_min: float, lat_max: float, long_ranges) -> list:
+    """Get the grid cells covering a bounding box as ranges of cell numbers.
+
+    Args:
+        lat_min (float): Minimum latitude of the box.
+        lat_max (float): Maximum latitude of the box.
+        long_ranges (list): (minimum, maximum) longitude ranges of the box.
+
+    Returns:
+        list: (first, last) cell numbers, one range per row and longitude
+            range.
+    """
+    ranges = []
+    for row in range(grid_row(lat_min), grid_row(lat_max) + 1):
+        for long_min, long_max in long_ranges:
+            # 180° would wrap around to the first column
+            if long_max >= 180:
+                last_column = GRID_COLUMNS - 1
+            else:
+                last_column = grid_column(long_max)
+            ranges.append((row * GRID_COLUMNS + grid_column(long_min),
+                           row * GRID_COLUMNS + last_column))
+    return ranges
+
+
+def haversine(lat: float, long: float, lats, longs) -> list:
+    """Get the great-circle distances from one coordinate to many others in
+    a single pass. Uses NumPy if it is installed and plain Python otherwise.
+    Compared to the geodesic distance on the ellipsoid, the error is below
+    0.5%, which is precise enough for radii of up to 50km.
+
+    Args:
+        lat (float): latitude of the origin
+        long (float): longitude of the origin
+        lats (list): latitudes of the other coordinates
+        longs (list): longitudes of the other coordinates
+
+    Returns:
+        list: Distances in km, in the order of the coordinates.
+    """
+    if np is not None:
+        return haversine_numpy(lat, long, lats, longs)
+    return haversine_python(lat, long, lats, longs)
+
+
+def haversine_numpy(lat: float, long: float, lats, longs) -> list:
+    """NumPy implementation of haversine()."""
+    lat, long = radians(float(lat)), radians(float(long))
+    lats = np.radians(np.asarray(lats, dtype=float))
+    longs = np.radians(np.asarray(longs, dtype=float))
+    a = (np.sin((lats - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2)
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))).tolist()
+
+
+def haversine_python(lat: float, long: float, lats, longs) -> list:
+    """Pure Python implementation of haversine()."""
+    lat, long = radians(float(lat)), radians(float(long))
+    cos_lat = cos(lat)
+    distances = []
+    for other_lat, other_long in zip(lats, longs):
+        other_lat, other_long = radians(float(other_lat)), radians(float(other_long))
+        a = (sin((other_lat - lat) / 2) ** 2
+             + cos_lat * cos(other_lat) * sin((other_long - long) / 2) ** 2)
+        distances.append(2 * EARTH_RADIUS_KM * asin(sqrt(a)))
+    return distances
+
+
+def within_radius(timeplace, candidates) -> list:
+    """Filter candidates down to the ones that are within the smaller of
+    both radii of a timeplace.
+
+    Args:
+        timeplace (TimePlace): The timeplace in the center.
+        candidates (list): TimePlaces to check.
+
+    Returns:
+        list: (candidate, distance in km) for the candidates that are close
+            enough, in their original order.
+    """
+    distances = haversine(timeplace.latitude, timeplace.longitude,
+                          [tp.latitude for tp in candidates],
+                          [tp.longitude for tp in candidates])
+    return [(tp, dist) for tp, dist in zip(candidates, distances)
+            if dist <= min(timeplace.radius, tp.radius)]
@@ -0,0 +1,49 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from geopy.distance import distance
+
+from apps.timeplace import geo
+
+
+class Command(BaseCommand):
+    help = ("Compare the time to compute the distances to a number of "
+            "candidates with geopy and with the batched haversine formula.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000,
+                            help="Number of candidates")
+        parser.add_argument("--radius", type=float, default=50,
+                            help="Maximum distance of the candidates in km")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        lat, long = 52.52, 13.40
+        # random candidates in the bounding box of the radius
+        lat_min, lat_max, ((long_min, long_max),) = geo.bounding_box(
+            lat, long, options["radius"])
+        lats = [random.uniform(lat_min, lat_max) for _ in range(count)]
+        longs = [random.uniform(long_min, long_max) for _ in range(count)]
+
+        start = perf_counter()
+        geodesic = [distance((lat, long), other).km
+                    for other in zip(lats, longs)]
+        results = [("geopy", perf_counter() - start)]
+
+        if geo.np is not None:
+            start = perf_counter()
+            geo.haversine_numpy(lat, long, lats, longs)
+            results.append(("haversine (numpy)", perf_counter() - start))
+
+        start = perf_counter()
+        haversine = geo.haversine_python(lat, long, lats, longs)
+        results.append(("haversine (python)", perf_counter() - start))
+
+        for name, seconds in results:
+            self.stdout.write(
+                f"{name:<20}{seconds * 1000:>10.2f} ms"
+                f"{seconds / count * 1e6:>10.3f} µs per distance"
+            )
+        error = max(abs(h - g) / g for h, g in zip(haversine, geodesic) if g)
+        self.stdout.write(f"Maximum relative error: {error:.4%}")
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from time import perf_counter
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.serializers import CompiledReadMixin
+from apps.match.models import Match
+from apps.match.serializers import MatchModelListRetrieveSerializer
+from apps.timeplace import geo, models, serializers
+from apps.user.models import User, UserProfile
+
+
+class Command(BaseCommand):
+    help = ("Compare the time to serialize timeplaces and matches with the "
+            "compiled read path and with the field by field path of DRF. "
+            "The objects are created in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000,
+                            help="Number of timeplaces and matches")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Best of this many runs is reported")
+
+    def create_objects(self, count):
+        users = User.objects.bulk_create(
+            User(username=f"benchmark_{i}", email=f"benchmark{i}@stsp.com")
+            for i in range(count))
+        UserProfile.objects.bulk_create(
+            UserProfile(user=user, name=user.username, hometown="town",
+                        slogan="slogan", birthday="2001-01-01", gender="D",
+                        phone="111111111", profile_email=user.email)
+            for user in users)
+        start = datetime.now(timezone.utc) + timedelta(days=30)
+        timeplaces = []
+        for i, user in enumerate(users):
+            lat = Decimal("52.520000") + Decimal(i % 100) / 1000
+            long = Decimal("13.400000") + Decimal(i // 100) / 1000
+            timeplaces.append(models.TimePlace(
+                user=user, start=start, end=start + timedelta(hours=3),
+                latitude=lat, longitude=long, city="Berlin", radius=10,
+                description=f"Benchmark timeplace {i}",
+                grid_cell=geo.grid_cell(lat, long)))
+        timeplaces = models.TimePlace.objects.bulk_create(timeplaces)
+        interests = models.Interest.objects.values_list("id", flat=True)[:2]
+        activities = models.Activity.objects.values_list("id", flat=True)[:2]
+        models.TimePlace.interests.through.objects.bulk_create(
+            models.TimePlace.interests.through(timeplace=tp, interest_id=pk)
+            for tp in timeplaces for pk in interests)
+        models.TimePlace.activities.through.objects.bulk_create(
+            models.TimePlace.activities.through(timeplace=tp, activity_id=pk)
+            for tp in timeplaces for pk in activities)
+        Match.objects.bulk_create(
+            Match(timeplace_1=tp, timeplace_2=timeplaces[i - 1],
+                  email_user_1=True, phone_user_2=True)
+            for i, tp in enumerate(timeplaces))
+        return users[0], [tp.pk for tp in timeplaces]
+
+    def measure(self, serialize, repeat):
+        """Best time of the DRF path and of the compiled path."""
+        results = []
+        try:
+            for compiled in (False, True):
+                CompiledReadMixin.compiled = compiled
+                results.append(min(self.time(serialize)
+                                   for _ in range(repeat)))
+        finally:
+            CompiledReadMixin.compiled = True
+        return results
+
+    def time(self, serialize):
+        start = perf_counter()
+        serialize()
+        return perf_counter() - start
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        with transaction.atomic():
+            user, timeplace_ids = self.create_objects(count)
+            timeplaces = list(
+                models.TimePlace.objects.filter(pk__in=timeplace_ids)
+                .select_related("user__userprofile")
+                .prefetch_related("interests", "activities"))
+            matches = list(
+                MatchModelListRetrieveSerializer.setup_eager_loading(
+                    Match.objects.filter(timeplace_1__in=timeplace_ids), user))
+            transaction.set_rollback(True)
+
+        context = {"request": SimpleNamespace(user=user)}
+        benchmarks = [
+            ("TimePlaceModelViewSerializer", lambda: serializers
+             .TimePlaceModelViewSerializer(timeplaces, many=True).data),
+            ("TimePlaceMatchSerializer", lambda: serializers
+             .TimePlaceMatchSerializer(timeplaces, many=True).data),
+            ("MatchModelListRetrieveSerializer", lambda: (
+                MatchModelListRetrieveSerializer(
+                    matches, many=True, context=context).data)),
+        ]
+        self.stdout.write(f"{'ms per 1000 objects':<34}{'DRF':>10}"
+                          f"{'compiled':>10}")
+        for name, serialize in benchmarks:
+            before, after = (seconds / count * 1000 * 1000 for seconds
+                             in self.measure(serialize, options["repeat"]))
+            self.stdout.write(f"{name:<34}{before:>10.2f}{after:>10.2f}"
+                              f"{before / after:>8.1f}x")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.timeplace import models, tasks
+
+
+class Command(BaseCommand):
+    help = ("Look up the cities of all timeplaces whose lookup is pending, "
+            "e.g. from a cronjob if GEOCODING_QUEUE is 'db'.")
+
+    def handle(self, *args, **options):
+        pending = (models.TimePlace.objects
+                   .filter(city_pending=True)
+                   .order_by("created_at")
+                   .values_list("id", flat=True))
+        filled = failed = 0
+        for timeplace_id in pending.iterator():
+            if tasks.fill_city(timeplace_id):
+                filled += 1
+            else:
+                failed += 1
+        self.stdout.write(f"Filled {filled} cities, {failed} lookups failed")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.timeplace import matching, models
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed potential matches of all timeplaces."
+
+    def handle(self, *args, **options):
+        models.MatchCandidate.objects.all().delete()
+        timeplaces = models.TimePlace.objects.filter(deleted=False)
+        count = 0
+        for timeplace in timeplaces.iterator():
+            matching.refresh_match_candidates(timeplace)
+            count += 1
+        self.stdout.write(f"Refreshed the match candidates of {count} timeplaces")
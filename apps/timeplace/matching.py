@@ -0,0 +1,164 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from apps.match.models import Match
+from apps.user.models import UserLanguage
+from . import geo, models
+
+
+def shared_relation(timeplace, relation: str) -> Exists:
+    """Build an EXISTS subquery that is true for every candidate that shares
+    at least one entry of the given many-to-many relation with a timeplace.
+
+    Args:
+        timeplace (TimePlace): The timeplace to compare against.
+        relation (str): Name of the many-to-many field, e.g. "interests".
+
+    Returns:
+        Exists: Expression to filter a TimePlace queryset with.
+    """
+    through = getattr(models.TimePlace, relation).through
+    target = getattr(models.TimePlace, relation).field.m2m_reverse_name()
+    own_ids = (through.objects
+               .filter(timeplace_id=timeplace.pk)
+               .values(target))
+    return Exists(through.objects.filter(
+        timeplace_id=OuterRef("pk"),
+        **{f"{target}__in": own_ids},
+    ))
+
+
+def nearby(timeplace) -> Q:
+    """Build a filter for all timeplaces in the bounding box around the
+    radius of a timeplace. The grid cells covering the box are looked up
+    first, so the database only has to check the timeplaces in those cells.
+
+    Args:
+        timeplace (TimePlace): The timeplace in the center of the box.
+
+    Returns:
+        Q: Filter for a TimePlace queryset.
+    """
+    lat_min, lat_max, long_ranges = geo.bounding_box(
+        timeplace.latitude, timeplace.longitude, timeplace.radius)
+    cells = reduce(or_, (Q(grid_cell__range=cell_range) for cell_range
+                         in geo.cell_ranges(lat_min, lat_max, long_ranges)))
+    longitudes = reduce(or_, (Q(longitude__range=long_range)
+                              for long_range in long_ranges))
+    return cells & Q(latitude__range=(lat_min, lat_max)) & longitudes
+
+
+def match_candidates(timeplace):
+    """Get all timeplaces that could be a match for the given timeplace.
+
+    Overlapping time, shared interests, shared activities, a shared language
+    and the absence of an existing match object are all checked by the
+    database as EXISTS subqueries, so the number of queries does not grow
+    with the number of candidates. The exact distance is not checked, the
+    coordinates are only limited to a bounding box around the timeplace.
+
+    Args:
+        timeplace (TimePlace): The timeplace to find matches for.
+
+    Returns:
+        QuerySet: The candidates, ordered by their start.
+    """
+    own_langs = (UserLanguage.objects
+                 .filter(userprofile__user_id=timeplace.user_id)
+                 .values("language_id"))
+    shared_language = Exists(UserLanguage.objects.filter(
+        userprofile__user_id=OuterRef("user_id"),
+        language_id__in=own_langs,
+    ))
+    existing_match = Exists(Match.objects.filter(
+        Q(timeplace_1_id=timeplace.pk, timeplace_2_id=OuterRef("pk")) |
+        Q(timeplace_1_id=OuterRef("pk"), timeplace_2_id=timeplace.pk)
+    ))
+    return (models.TimePlace.objects
+            # excludes results by the same user
+            .exclude(user_id=timeplace.user_id)
+            .exclude(deleted=True)
+            .filter(
+                # filter start and end time to be less/greater than obj
+                start__lte=timeplace.end,
+                end__gte=timeplace.start,
+            )
+            .filter(nearby(timeplace))
+            .filter(shared_relation(timeplace, "interests"))
+            .filter(shared_relation(timeplace, "activities"))
+            .filter(shared_language)
+            .filter(~existing_match)
+            .order_by("start")
+            )
+
+
+def overlap_scores(timeplace, candidate_ids) -> dict:
+    """Count the interests and activities the candidates share with a
+    timeplace.
+
+    Args:
+        timeplace (TimePlace): The timeplace to compare against.
+        candidate_ids (list): Ids of the candidates.
+
+    Returns:
+        dict: Number of shared interests and activities by candidate id.
+    """
+    scores = dict.fromkeys(candidate_ids, 0)
+    for relation in ("interests", "activities"):
+        through = getattr(models.TimePlace, relation).through
+        target = getattr(models.TimePlace, relation).field.m2m_reverse_name()
+        own_ids = (through.objects
+                   .filter(timeplace_id=timeplace.pk)
+                   .values(target))
+        shared = (through.objects
+                  .filter(timeplace_id__in=candidate_ids,
+                          **{f"{target}__in": own_ids})
+                  .values("timeplace_id")
+                  .annotate(shared=Count("pk"))
+                  .values_list("timeplace_id", "shared"))
+        for candidate_id, count in shared:
+            scores[candidate_id] += count
+    return scores
+
+
+@transaction.atomic
+def refresh_match_candidates(timeplace):
+    """Recompute the stored potential matches of a timeplace. The rows of
+    both directions of every pair are replaced.
+
+    A concurrent refresh of a neighbouring timeplace writes the same pairs,
+    so existing rows are updated instead of raising on the unique
+    constraint. The rows are written in key order so two refreshes can't
+    deadlock on each other's rows.
+
+    Args:
+        timeplace (TimePlace): The timeplace that was changed.
+    """
+    models.MatchCandidate.objects.filter(
+        Q(timeplace_id=timeplace.pk) | Q(candidate_id=timeplace.pk)
+    ).delete()
+    if timeplace.deleted:
+        return
+
+    candidates = geo.within_radius(timeplace, list(
+        match_candidates(timeplace)
+        .only("id", "start", "latitude", "longitude", "radius")
+    ))
+    scores = overlap_scores(timeplace, [tp.id for tp, _ in candidates])
+
+    rows = []
+    for tp, distance in candidates:
+        rows.append(models.MatchCandidate(
+            timeplace_id=timeplace.pk, candidate_id=tp.id, start=tp.start,
+            distance=distance, score=scores[tp.id]))
+        rows.append(models.MatchCandidate(
+            timeplace_id=tp.id, candidate_id=timeplace.pk,
+            start=timeplace.start, distance=distance, score=scores[tp.id]))
+    rows.sort(key=lambda row: (row.timeplace_id, row.candidate_id))
+    models.MatchCandidate.objects.bulk_create(
+        rows, update_conflicts=True,
+        unique_fields=["timeplace", "candidate"],
+        update_fields=["start", "distance", "score"])
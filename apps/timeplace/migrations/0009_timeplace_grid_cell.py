@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+from apps.timeplace.geo import grid_cell
+
+
+def fill_grid_cells(apps, schema_editor):
+    TimePlace = apps.get_model("timeplace", "TimePlace")
+    timeplaces = list(TimePlace.objects.only("id", "latitude", "longitude"))
+    for timeplace in timeplaces:
+        timeplace.grid_cell = grid_cell(timeplace.latitude, timeplace.longitude)
+    TimePlace.objects.bulk_update(timeplaces, ["grid_cell"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timeplace", "0008_timeplace_city"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timeplace",
+            name="grid_cell",
+            field=models.PositiveIntegerField(
+                db_index=True, default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_grid_cells, migrations.RunPython.noop),
+    ]
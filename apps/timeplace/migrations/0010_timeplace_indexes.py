@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeplace', '0009_timeplace_grid_cell'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timeplace',
+            name='grid_cell',
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='timeplace',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['grid_cell', 'start', 'end'], name='timeplace_active_cell_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeplace',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['user', '-created_at'], name='timeplace_active_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeplace',
+            index=models.Index(fields=['-created_at'], name='timeplace_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeplace', '0010_timeplace_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('distance', models.FloatField()),
+                ('score', models.PositiveSmallIntegerField()),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='timeplace.timeplace')),
+                ('timeplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_candidates', to='timeplace.timeplace')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['timeplace', 'start', 'candidate'], name='matchcandidate_start_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='matchcandidate',
+            constraint=models.UniqueConstraint(fields=('timeplace', 'candidate'), name='unique match candidate'),
+        ),
+    ]
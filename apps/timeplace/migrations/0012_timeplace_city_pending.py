@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeplace', '0011_matchcandidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeplace',
+            name='city_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='timeplace',
+            index=models.Index(condition=models.Q(('city_pending', True)), fields=['created_at'], name='timeplace_city_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeplace', '0012_timeplace_city_pending'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='timeplace',
+            name='timeplace_active_user_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timeplace',
+            name='timeplace_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='timeplace',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['user', '-created_at', '-id'], name='timeplace_active_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeplace',
+            index=models.Index(fields=['-created_at', '-id'], name='timeplace_created_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 
 from apps.core.models import CreatedModifiedDateTimeBase, SoftDelete
 from apps.user.models import User
+from .geo import grid_cell
 
 
 class Interest(CreatedModifiedDateTimeBase):
@@ -35,7 +36,76 @@ class TimePlace(CreatedModifiedDateTimeBase, SoftDelete):
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     city = models.CharField(max_length=100, null=True, blank=True)
+    # The city still has to be looked up, see tasks.py
+    city_pending = models.BooleanField(default=False, editable=False)
     radius = models.PositiveSmallIntegerField()
     description = models.CharField(max_length=500)
     interests = models.ManyToManyField("timeplace.Interest")
     activities = models.ManyToManyField("timeplace.Activity")
+    # Number of the lat/long grid cell, used to look up nearby timeplaces
+    grid_cell = models.PositiveIntegerField(editable=False)
+
+    class Meta:
+        indexes = [
+            # Candidate lookup of the matching, see matching.match_candidates
+            models.Index(
+                fields=["grid_cell", "start", "end"],
+                name="timeplace_active_cell_idx",
+                condition=models.Q(deleted=False),
+            ),
+            # Timeplaces of a user, newest first
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="timeplace_active_user_idx",
+                condition=models.Q(deleted=False),
+            ),
+            # Timeplaces of all users for superusers, newest first
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="timeplace_created_idx",
+            ),
+            # Queue of the city lookups
+            models.Index(
+                fields=["created_at"],
+                name="timeplace_city_pending_idx",
+                condition=models.Q(city_pending=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Keep the grid cell in sync with the coordinates.
+        """
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+
+class MatchCandidate(models.Model):
+    """Model to store the precomputed potential matches of a TimePlace.
+    Every pair is stored for both timeplaces, the rows are kept up to date
+    by the signals in signals.py.
+    """
+    timeplace = models.ForeignKey(
+        "timeplace.TimePlace", on_delete=models.CASCADE,
+        related_name="match_candidates")
+    candidate = models.ForeignKey(
+        "timeplace.TimePlace", on_delete=models.CASCADE, related_name="+")
+    # Start of the candidate, to list the candidates in order
+    start = models.DateTimeField()
+    # Distance between the timeplaces in km
+    distance = models.FloatField()
+    # Number of shared interests and activities
+    score = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["timeplace", "candidate"],
+                name="unique match candidate"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["timeplace", "start", "candidate"],
+                name="matchcandidate_start_idx",
+            ),
+        ]
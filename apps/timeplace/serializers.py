@@ -1,30 +1,168 @@
 from datetime import datetime, timezone
 import pytz
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from apps.core.catalog import CatalogPrimaryKeyRelatedField
+from apps.core.gazetteer import Gazetteer
+from apps.core.serializers import CompiledReadMixin
 from apps.user.serializers import UserModelSerializer
-from apps.core.utils import get_nearest_city
-from . import models
+from . import catalogs, matching, models, tasks
+from .geo import grid_cell
 
 
-class InterestModelSerializer(serializers.ModelSerializer):
+RELATIONS = ("interests", "activities")
+
+
+class InterestModelSerializer(CompiledReadMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Interest
         fields = ["id","name"]
 
+    def to_representation(self, instance):
+        # The names are read from memory
+        row = catalogs.INTERESTS.get(instance.pk)
+        if row is None:
+            return super().to_representation(instance)
+        return dict(row)
+
 
-class ActivityModelSerializer(serializers.ModelSerializer):
+class ActivityModelSerializer(CompiledReadMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Activity
         fields = ["id","name"]
 
+    def to_representation(self, instance):
+        # The names are read from memory
+        row = catalogs.ACTIVITIES.get(instance.pk)
+        if row is None:
+            return super().to_representation(instance)
+        return dict(row)
+
+
+def pop_relations(validated_data) -> dict:
+    """Take the interests and activities out of validated data."""
+    return {name: validated_data.pop(name) for name in RELATIONS
+            if name in validated_data}
+
+
+def check_relations(items):
+    """Check that the interests and activities of one or more timeplaces
+    still exist, with one query per relation. The ids are validated against
+    the catalogs, which can miss a row deleted by another process within
+    CATALOG_TTL.
+
+    Args:
+        items (list): Dicts of the interests or activities by field name.
+
+    Raises:
+        ValidationError: If an id doesn't exist anymore.
+    """
+    errors = {}
+    for name in RELATIONS:
+        wanted = {obj.pk for item in items for obj in item.get(name, ())}
+        if not wanted:
+            continue
+        model = models.TimePlace._meta.get_field(name).related_model
+        missing = wanted - set(model.objects.filter(pk__in=wanted)
+                               .values_list("pk", flat=True))
+        if missing:
+            message = (serializers.PrimaryKeyRelatedField
+                       .default_error_messages["does_not_exist"])
+            errors[name] = [message.format(pk_value=pk)
+                            for pk in sorted(missing)]
+    if errors:
+        raise serializers.ValidationError(errors)
+
+
+def write_relations(timeplace, relations: dict, created: bool = False):
+    """Write the interests and activities of a timeplace with one query to
+    read, one to delete and one to insert the rows of each relation.
+    Unlike set(), no m2m_changed signals are sent, so the caller has to
+    refresh the match candidates.
+
+    Args:
+        timeplace (TimePlace): The saved timeplace.
+        relations (dict): Interests or activities by field name.
+        created (bool, optional): The timeplace is new and has no rows.
+    """
+    for name, objs in relations.items():
+        field = models.TimePlace._meta.get_field(name)
+        through = field.remote_field.through
+        target = field.m2m_reverse_name()
+        wanted = {obj.pk for obj in objs}
+        current = set() if created else set(
+            through.objects.filter(timeplace_id=timeplace.pk)
+            .values_list(target, flat=True))
+        if current - wanted:
+            through.objects.filter(
+                timeplace_id=timeplace.pk,
+                **{f"{target}__in": current - wanted}).delete()
+        if wanted - current:
+            through.objects.bulk_create(
+                through(timeplace_id=timeplace.pk, **{target: pk})
+                for pk in wanted - current)
+
+
+class TimePlaceBulkCreateSerializer(serializers.ListSerializer):
+    """Serializer to create a list of TimePlaces in one transaction. The
+    rows and their interests and activities are inserted in bulk and the
+    cities are looked up in one background batch.
+    """
+    @transaction.atomic
+    def create(self, validated_data):
+        gazetteer = Gazetteer()
+        timeplaces = []
+        relations = []
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            relations.append(pop_relations(attrs))
+            timeplace = models.TimePlace(**attrs)
+            # bulk_create doesn't call save()
+            timeplace.grid_cell = grid_cell(timeplace.latitude,
+                                            timeplace.longitude)
+            if gazetteer.available:
+                timeplace.city = gazetteer.nearest_city(
+                    timeplace.latitude, timeplace.longitude)
+            else:
+                timeplace.city_pending = True
+            timeplaces.append(timeplace)
+        check_relations(relations)
+        models.TimePlace.objects.bulk_create(timeplaces)
+
+        # One insert per relation for all timeplaces
+        for name in RELATIONS:
+            field = models.TimePlace._meta.get_field(name)
+            through = field.remote_field.through
+            target = field.m2m_reverse_name()
+            through.objects.bulk_create(
+                through(timeplace_id=timeplace.pk, **{target: pk})
+                for timeplace, item in zip(timeplaces, relations)
+                for pk in {obj.pk for obj in item[name]})
+        prefetch_related_objects(timeplaces, "interests", "activities")
+
+        # bulk_create sends no signals
+        for timeplace in timeplaces:
+            matching.refresh_match_candidates(timeplace)
+        tasks.schedule_city_lookups(
+            [timeplace.pk for timeplace in timeplaces
+             if timeplace.city_pending])
+        return timeplaces
+
 
 class TimePlaceModelCreateSerializer(serializers.ModelSerializer):
     """Serializer to create a TimePlace model instance that takes interests 
     and activities as a list of integers and does not include the user.
-    Automatically fills the city field with the nearest city to the given
-    coordinates in a radius of 100 miles.
+    Fills the city field with the nearest city to the given coordinates in
+    a radius of 100 miles, in the background if there is no offline
+    gazetteer.
     """
+    interests = CatalogPrimaryKeyRelatedField(
+        catalogs.INTERESTS, many=True, allow_empty=False)
+    activities = CatalogPrimaryKeyRelatedField(
+        catalogs.ACTIVITIES, many=True, allow_empty=False)
+
     class Meta:
         model = models.TimePlace
         fields = [
@@ -38,6 +176,7 @@ class TimePlaceModelCreateSerializer(serializers.ModelSerializer):
             "interests",
             "activities"
         ]
+        list_serializer_class = TimePlaceBulkCreateSerializer
 
     def validate(self, attrs):
         # We need to have all datetimes in the same timezone
@@ -62,9 +201,22 @@ class TimePlaceModelCreateSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        validated_data['city'] = get_nearest_city(
-            validated_data['latitude'], validated_data['longitude'])
-        return super(TimePlaceModelCreateSerializer, self).create(validated_data)
+        relations = pop_relations(validated_data)
+        check_relations([relations])
+        gazetteer = Gazetteer()
+        if gazetteer.available:
+            # The offline lookup is fast enough to do it right away
+            validated_data['city'] = gazetteer.nearest_city(
+                validated_data['latitude'], validated_data['longitude'])
+        else:
+            validated_data['city_pending'] = True
+        with transaction.atomic():
+            instance = super(TimePlaceModelCreateSerializer, self).create(validated_data)
+            write_relations(instance, relations, created=True)
+            matching.refresh_match_candidates(instance)
+        if instance.city_pending:
+            tasks.schedule_city_lookups([instance.pk])
+        return instance
 
     def to_representation(self, instance):
         return (TimePlaceModelViewSerializer(context=self.context)
@@ -74,6 +226,11 @@ class TimePlaceModelUpdateSerializer(serializers.ModelSerializer):
     """Serializer to update a TimePlace model instance that takes interests 
     and activities as a list of integers and does not include the user.
     """
+    interests = CatalogPrimaryKeyRelatedField(
+        catalogs.INTERESTS, many=True, allow_empty=False)
+    activities = CatalogPrimaryKeyRelatedField(
+        catalogs.ACTIVITIES, many=True, allow_empty=False)
+
     class Meta:
         model = models.TimePlace
         fields = [
@@ -102,8 +259,18 @@ class TimePlaceModelUpdateSerializer(serializers.ModelSerializer):
                 "Radius can be 50km at most.")
         return attrs
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Saving after the relations are written refreshes the match
+        # candidates once
+        relations = pop_relations(validated_data)
+        check_relations([relations])
+        write_relations(instance, relations)
+        return super().update(instance, validated_data)
+
 
-class TimePlaceModelViewSerializer(serializers.ModelSerializer):
+class TimePlaceModelViewSerializer(CompiledReadMixin,
+                                   serializers.ModelSerializer):
     """Serializer for the TimePlace model that includes detailed
     information about the user, interests and activities
     """
@@ -156,7 +323,8 @@ class TimePlaceModelAdminSerializer(serializers.ModelSerializer):
         ]
 
 
-class TimePlaceMatchSerializer(serializers.ModelSerializer):
+class TimePlaceMatchSerializer(CompiledReadMixin,
+                               serializers.ModelSerializer):
     """Serializer to show the matches for a Timeplace
     """
     interests = InterestModelSerializer(many=True)
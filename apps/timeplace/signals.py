@@ -0,0 +1,72 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.match.models import Match
+from apps.user.models import UserLanguage
+from . import matching, models
+
+
+@receiver(post_save, sender=models.TimePlace)
+def timeplace_saved(sender, instance, created, raw=False, **kwargs):
+    """Recompute the potential matches of an updated or soft-deleted
+    timeplace. A new timeplace has no interests and activities yet, it is
+    matched once they are added.
+    """
+    if raw or created:
+        return
+    matching.refresh_match_candidates(instance)
+
+
+@receiver(m2m_changed, sender=models.TimePlace.interests.through)
+@receiver(m2m_changed, sender=models.TimePlace.activities.through)
+def timeplace_relations_changed(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Recompute the potential matches when interests or activities of a
+    timeplace were added or removed.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        matching.refresh_match_candidates(instance)
+    elif pk_set:
+        # e.g. interest.timeplace_set.add(), the timeplaces are in pk_set
+        for timeplace in models.TimePlace.objects.filter(pk__in=pk_set):
+            matching.refresh_match_candidates(timeplace)
+
+
+@receiver(post_save, sender=UserLanguage)
+@receiver(post_delete, sender=UserLanguage)
+def user_language_changed(sender, instance, raw=False, **kwargs):
+    """Recompute the potential matches of all timeplaces of a user whose
+    languages changed.
+    """
+    if raw:
+        return
+    timeplaces = models.TimePlace.objects.filter(
+        user__userprofile__id=instance.userprofile_id, deleted=False)
+    for timeplace in timeplaces:
+        matching.refresh_match_candidates(timeplace)
+
+
+@receiver(post_save, sender=Match)
+def match_saved(sender, instance, created, raw=False, **kwargs):
+    """Timeplaces with a match object aren't potential matches anymore.
+    """
+    if raw or not created:
+        return
+    models.MatchCandidate.objects.filter(
+        timeplace_id__in=(instance.timeplace_1_id, instance.timeplace_2_id),
+        candidate_id__in=(instance.timeplace_1_id, instance.timeplace_2_id),
+    ).delete()
+
+
+@receiver(post_delete, sender=Match)
+def match_deleted(sender, instance, **kwargs):
+    """Timeplaces can be potential matches again once their match object
+    is removed from the database.
+    """
+    timeplace = (models.TimePlace.objects
+                 .filter(pk=instance.timeplace_1_id)
+                 .first())
+    if timeplace is not None:
+        matching.refresh_match_candidates(timeplace)
@@ -0,0 +1,93 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import sleep
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from apps.core.utils import GeocodingError, lookup_nearest_city
+from . import models
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool of this process that runs the city lookups."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.GEOCODING_WORKERS,
+                thread_name_prefix="geocoding",
+            )
+    return _executor
+
+
+def schedule_city_lookups(timeplace_ids):
+    """Look up the cities of timeplaces in the background. The timeplaces
+    need to have city_pending set. With the thread queue, the lookups start
+    once the current transaction is committed, so the worker can see the
+    timeplaces.
+
+    Args:
+        timeplace_ids (list): Ids of the timeplaces that need a city.
+    """
+    if settings.GEOCODING_QUEUE == "thread":
+        timeplace_ids = list(timeplace_ids)
+        transaction.on_commit(
+            lambda: get_executor().submit(run_city_lookups, timeplace_ids))
+
+
+def fill_city(timeplace_id: int) -> bool:
+    """Look up the city of a timeplace and save it. Failed lookups are
+    retried with an exponential backoff.
+
+    Args:
+        timeplace_id (int): Id of the timeplace.
+
+    Returns:
+        bool: True if the city was looked up, False if all attempts failed.
+    """
+    timeplace = (models.TimePlace.objects
+                 .filter(pk=timeplace_id)
+                 .only("latitude", "longitude")
+                 .first())
+    if timeplace is None:
+        return True
+
+    delay = settings.GEOCODING_BACKOFF
+    for attempt in range(1, settings.GEOCODING_RETRIES + 1):
+        try:
+            city = lookup_nearest_city(timeplace.latitude, timeplace.longitude)
+        except GeocodingError as e:
+            logger.warning("City lookup of timeplace %s failed (attempt %s): %s",
+                           timeplace_id, attempt, e)
+            if attempt < settings.GEOCODING_RETRIES:
+                sleep(delay)
+                delay *= 2
+            continue
+        # update() doesn't trigger the recomputation of the match candidates
+        (models.TimePlace.objects
+         .filter(pk=timeplace_id)
+         .update(city=city, city_pending=False))
+        return True
+    # Stays pending, 'manage.py fill_cities' can try again later
+    return False
+
+
+def run_city_lookups(timeplace_ids):
+    """Entry point of the worker threads, which need their own database
+    connection.
+    """
+    close_old_connections()
+    try:
+        for timeplace_id in timeplace_ids:
+            fill_city(timeplace_id)
+    except Exception:
+        logger.exception("City lookup of timeplaces %s crashed", timeplace_ids)
+    finally:
+        connection.close()
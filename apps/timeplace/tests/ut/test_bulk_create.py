@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from apps.timeplace import catalogs, models, tasks
+from apps.user.models import Language, User, UserLanguage, UserProfile
+
+from .test_tasks import InlineExecutor
+
+
+@override_settings(GEOCODING_QUEUE="thread", GAZETTEER_PATH=None,
+                   TIMEPLACE_BULK_CREATE_MAX=3)
+class TestBulkCreate(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="user_bulk",
+            email="user_bulk@stsp.com",
+            password="user@2023",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.other = User.objects.create_user(
+            username="other_bulk",
+            email="other_bulk@stsp.com",
+            password="user@2023",
+        )
+        for user in (cls.user, cls.other):
+            profile = UserProfile.objects.create(
+                user=user,
+                name=user.username,
+                birthday="2000-01-01",
+                gender="D",
+            )
+            UserLanguage.objects.create(
+                userprofile=profile,
+                language=Language.objects.get(pk=1),
+                level="Fluent",
+            )
+        cls.start = datetime.now(timezone.utc) + timedelta(days=30)
+        cls.other_tp = models.TimePlace.objects.create(
+            user=cls.other,
+            start=cls.start,
+            end=cls.start + timedelta(hours=3),
+            latitude=52.52,
+            longitude=13.40,
+            radius=10,
+            description="Already here",
+            city="Berlin",
+        )
+        cls.other_tp.interests.set([1])
+        cls.other_tp.activities.set([1])
+
+    def setUp(self):
+        self.url = reverse("timeplace-bulk-create")
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def item(self, description, **kwargs):
+        item = {
+            "start": self.start.isoformat(),
+            "end": (self.start + timedelta(hours=3)).isoformat(),
+            "latitude": 52.52,
+            "longitude": 13.40,
+            "radius": 10,
+            "description": description,
+            "interests": [1, 2],
+            "activities": [1],
+        }
+        item.update(kwargs)
+        return item
+
+    @mock.patch.object(tasks, "get_executor", return_value=InlineExecutor())
+    @mock.patch.object(tasks, "lookup_nearest_city", return_value="Berlin")
+    def test_bulk_create(self, lookup, executor):
+        """Test if all timeplaces are created with their interests and
+        activities, matched and get their city after the commit.
+        """
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(self.url, [
+                self.item("First"), self.item("Second", interests=[1, 3])
+            ], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([tp["description"] for tp in response.data],
+                         ["First", "Second"])
+        self.assertEqual(response.data[0]["user"]["id"], self.user.id)
+        self.assertEqual({i["id"] for i in response.data[1]["interests"]},
+                         {1, 3})
+        # The cities of all timeplaces are looked up in one batch
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(lookup.call_count, 2)
+
+        timeplaces = models.TimePlace.objects.filter(user=self.user)
+        self.assertEqual(timeplaces.count(), 2)
+        for timeplace in timeplaces:
+            self.assertEqual(timeplace.city, "Berlin")
+            self.assertTrue(models.MatchCandidate.objects.filter(
+                timeplace=timeplace, candidate=self.other_tp).exists())
+        first = timeplaces.get(description="First")
+        self.assertEqual(set(first.interests.values_list("id", flat=True)),
+                         {1, 2})
+        self.assertEqual(first.grid_cell, self.other_tp.grid_cell)
+
+    def test_errors_are_reported_per_item(self):
+        """Test if invalid items get their own errors and nothing is
+        created.
+        """
+        response = self.client.post(self.url, [
+            self.item("Valid"),
+            self.item("Far away", radius=100),
+            self.item("Unknown interest", interests=[99999]),
+        ], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("non_field_errors", response.data[1])
+        self.assertIn("interests", response.data[2])
+        self.assertFalse(
+            models.TimePlace.objects.filter(user=self.user).exists())
+
+    def test_deleted_catalog_rows_are_refused(self):
+        """Test if an interest that another process deleted while it's still
+        in this process' catalog gives a 400 and not an error.
+        """
+        stale = dict(catalogs.INTERESTS.get(1), id=99999)
+        with mock.patch.object(catalogs.INTERESTS, "get",
+                               return_value=stale):
+            response = self.client.post(
+                self.url, [self.item("Stale", interests=[99999])],
+                format="json")
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+            self.assertIn("interests", response.data)
+            response = self.client.post(
+                reverse("timeplace-list"),
+                self.item("Stale", interests=[99999]), format="json")
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            models.TimePlace.objects.filter(user=self.user).exists())
+
+    def test_list_size_is_limited(self):
+        """Test if empty lists and lists above the maximum are rejected.
+        """
+        response = self.client.post(self.url, [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            self.url, [self.item(str(i)) for i in range(4)], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            models.TimePlace.objects.filter(user=self.user).exists())
+
+    def test_unauthenticated_user_cannot_bulk_create(self):
+        """Test if the endpoint requires a token.
+        """
+        self.client.credentials()
+        response = self.client.post(self.url, [self.item("First")],
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,9 +1,12 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
-from apps.timeplace import models
+from apps.timeplace import catalogs, models
 from apps.user.models import User
 
 
@@ -421,3 +424,69 @@ class TestTimePlaceEndpoints(APITestCase):
         self.client.credentials(HTTP_AUTHORIZATION="Token " + self.supertoken.key)
         delete_response = self.client.delete(url)
         self.assertEqual(delete_response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+@override_settings(GAZETTEER_PATH=None)
+class TestTimePlaceWriteQueryCount(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="user_writes",
+            email="user_writes@stsp.com",
+            password="user@2023",
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        # The ids are validated against the catalogs
+        for catalog in (catalogs.INTERESTS, catalogs.ACTIVITIES):
+            catalog.invalidate()
+            catalog.rows()
+            self.addCleanup(catalog.invalidate)
+        self.start = datetime.now(timezone.utc) + timedelta(days=30)
+
+    def data(self, interests, activities):
+        return {
+            "start": self.start.isoformat(),
+            "end": (self.start + timedelta(hours=3)).isoformat(),
+            "latitude": 52.52,
+            "longitude": 13.40,
+            "radius": 10,
+            "description": "Counting queries",
+            "interests": interests,
+            "activities": activities,
+        }
+
+    def test_create_query_count(self):
+        """Test if the interests and activities are validated without
+        queries and written with one insert each.
+        """
+        # 2 to check and 2 to write the relations, timeplace, 2 to refresh
+        # the candidates, 2 for the output and 4 savepoints
+        with self.assertNumQueries(13):
+            response = self.client.post(reverse("timeplace-list"),
+                                        self.data([1, 2, 3], [1, 2]),
+                                        format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        timeplace = models.TimePlace.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            set(timeplace.interests.values_list("id", flat=True)), {1, 2, 3})
+        self.assertEqual(
+            set(timeplace.activities.values_list("id", flat=True)), {1, 2})
+
+    def test_update_query_count(self):
+        """Test if an update reads, deletes and inserts each relation once
+        and refreshes the match candidates once.
+        """
+        response = self.client.post(reverse("timeplace-list"),
+                                    self.data([1, 2, 3], [1, 2]),
+                                    format="json")
+        url = reverse("timeplace-detail", args=(response.data["id"],))
+        # 3 to load the timeplace, 4 for each relation, update, 2 to
+        # refresh the candidates, 2 for the output and 4 savepoints
+        with self.assertNumQueries(20):
+            response = self.client.put(url, self.data([2, 3, 4], [2, 3]),
+                                       format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["interests"]), {2, 3, 4})
+        self.assertEqual(set(response.data["activities"]), {2, 3})
@@ -0,0 +1,98 @@
+import random
+from math import cos, radians
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+from geopy.distance import distance
+
+from apps.timeplace import geo
+
+
+class TestGrid(SimpleTestCase):
+    def assertCovered(self, lat, long, radius, point):
+        """Check if a point is inside the bounding box and grid cells around
+        a coordinate.
+        """
+        lat_min, lat_max, long_ranges = geo.bounding_box(lat, long, radius)
+        self.assertTrue(lat_min <= point[0] <= lat_max)
+        self.assertTrue(any(long_min <= point[1] <= long_max
+                            for long_min, long_max in long_ranges))
+        cell = geo.grid_cell(*point)
+        self.assertTrue(any(first <= cell <= last for first, last
+                            in geo.cell_ranges(lat_min, lat_max, long_ranges)))
+
+    def test_grid_cell_numbers(self):
+        """Test if cells are numbered row by row from the south pole.
+        """
+        self.assertEqual(geo.grid_cell(-90, -180), 0)
+        self.assertEqual(geo.grid_cell(-90, 179.9), geo.GRID_COLUMNS - 1)
+        self.assertEqual(geo.grid_cell(-89.5, -180), geo.GRID_COLUMNS)
+        self.assertEqual(geo.grid_cell(90, 180),
+                         (geo.GRID_ROWS - 1) * geo.GRID_COLUMNS)
+
+    def test_box_is_wider_towards_the_poles(self):
+        """Test if the longitude range grows with the latitude.
+        """
+        _, _, equator = geo.bounding_box(0, 0, 50)
+        _, _, north = geo.bounding_box(60, 0, 50)
+        equator_width = equator[0][1] - equator[0][0]
+        north_width = north[0][1] - north[0][0]
+        self.assertAlmostEqual(north_width * cos(radians(60)),
+                               equator_width, places=2)
+
+    def test_box_contains_radius(self):
+        """Test if points on the radius are inside the box and its cells.
+        """
+        # 50km are about 0.45° latitude
+        self.assertCovered(52.52, 13.40, 50, (52.96, 13.40))
+        self.assertCovered(52.52, 13.40, 50, (52.08, 13.40))
+        # and about 0.74° longitude at 52.52°
+        self.assertCovered(52.52, 13.40, 50, (52.52, 14.13))
+        self.assertCovered(52.52, 13.40, 50, (52.52, 12.67))
+
+    def test_box_across_antimeridian(self):
+        """Test if a box crossing 180° is split into two longitude ranges.
+        """
+        _, _, long_ranges = geo.bounding_box(-17.0, 179.9, 25)
+        self.assertEqual(len(long_ranges), 2)
+        self.assertCovered(-17.0, 179.9, 25, (-17.0, -179.9))
+        self.assertCovered(-17.0, -179.9, 25, (-17.0, 179.9))
+
+    def test_box_around_pole(self):
+        """Test if a box around a pole spans all longitudes.
+        """
+        _, lat_max, long_ranges = geo.bounding_box(89.9, 0, 50)
+        self.assertEqual(lat_max, 90)
+        self.assertEqual(long_ranges, [(-180, 180)])
+        self.assertCovered(89.9, 0, 50, (89.9, 180))
+
+
+class TestHaversine(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(42)
+        cls.origin = (52.52, 13.40)
+        cls.lats = [rng.uniform(52.07, 52.97) for _ in range(200)]
+        cls.longs = [rng.uniform(12.66, 14.14) for _ in range(200)]
+        cls.geodesic = [distance(cls.origin, other).km
+                        for other in zip(cls.lats, cls.longs)]
+
+    def assertAccurate(self, distances):
+        """Check the distances against the geodesic distances from geopy.
+        """
+        for dist, geodesic in zip(distances, self.geodesic):
+            self.assertLess(abs(dist - geodesic), geodesic * 0.005 + 0.001)
+
+    def test_python_accuracy(self):
+        """Test if the pure Python distances are within 0.5% of geopy.
+        """
+        self.assertAccurate(geo.haversine_python(*self.origin,
+                                                 self.lats, self.longs))
+
+    @skipIf(geo.np is None, "NumPy is not installed")
+    def test_numpy_accuracy(self):
+        """Test if the NumPy distances are within 0.5% of geopy.
+        """
+        self.assertAccurate(geo.haversine_numpy(*self.origin,
+                                                self.lats, self.longs))
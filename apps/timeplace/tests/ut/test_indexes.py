@@ -0,0 +1,73 @@
+from unittest import skipUnless
+
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from apps.timeplace import matching, models
+from apps.user import models as usermodels
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output of PostgreSQL")
+class TestTimePlaceIndexes(APITestCase):
+    """Check the query plans of the hot TimePlace queries.
+    The test database is tiny, so sequential and bitmap scans are disabled to
+    see which index the planner would pick for a big table.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = usermodels.User.objects.create_user(
+            username="user_1",
+            email="user1@stsp.com",
+            password="user@2023",
+        )
+        cls.tp = models.TimePlace.objects.create(
+            user=cls.user,
+            start="2025-12-01T12:00+01:00",
+            end="2025-12-01T15:00+01:00",
+            latitude=10.123456,
+            longitude=10.123456,
+            radius=10,
+            description="I want to explain queries",
+        )
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            # Only lasts until the end of the test's transaction
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+    def test_matches_query_uses_cell_index(self):
+        """Test if the candidate query of the matching uses the partial
+        grid cell index.
+        """
+        plan = matching.match_candidates(self.tp).explain()
+        self.assertIn("timeplace_active_cell_idx", plan)
+
+    def test_list_query_uses_user_index(self):
+        """Test if listing the timeplaces of a user uses the partial
+        user index.
+        """
+        queryset = (models.TimePlace.objects
+                    .filter(user=self.user)
+                    .filter(deleted=False)
+                    .order_by("-created_at"))
+        plan = queryset.explain()
+        self.assertIn("timeplace_active_user_idx", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_superuser_list_query_uses_created_index(self):
+        """Test if listing all timeplaces uses the created_at index.
+        """
+        plan = models.TimePlace.objects.order_by("-created_at")[:50].explain()
+        self.assertIn("timeplace_created_idx", plan)
+
+    def test_matches_read_uses_candidate_index(self):
+        """Test if reading the precomputed matches of a timeplace uses the
+        candidate index without sorting.
+        """
+        queryset = (models.MatchCandidate.objects
+                    .filter(timeplace=self.tp)
+                    .order_by("start", "candidate"))
+        plan = queryset[:50].explain()
+        self.assertIn("matchcandidate_start_idx", plan)
+        self.assertNotIn("Sort", plan)
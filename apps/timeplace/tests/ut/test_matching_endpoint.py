@@ -1,9 +1,14 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
-from apps.timeplace import models
+from apps.timeplace import matching, models
+from apps.timeplace.matching import overlap_scores
 from apps.user import models as usermodels
 from apps.match import models as matchmodels
 
@@ -475,3 +480,175 @@ class TestInterestEndpoints(APITestCase):
         # Delete TimePlace and languages used for this test
         testlang1.delete()
         test_tp.delete()
+
+
+class TestMatchingQueryCount(APITestCase):
+    """Benchmark for the number of queries the matching endpoint needs
+    with a growing number of candidates.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = usermodels.User.objects.create_user(
+            username="main_user",
+            email="main@stsp.com",
+            password="user@2023",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.profile = usermodels.UserProfile.objects.create(
+            user = cls.user,
+            name = "main",
+            hometown = "maintown",
+            slogan = "mainslogan",
+            birthday = "2001-01-01",
+            gender = "D",
+            phone = "111111111",
+            profile_email = "main@stsp.com",
+        )
+        usermodels.UserLanguage.objects.create(
+            userprofile = cls.profile,
+            language = usermodels.Language.objects.get(pk=1),
+            level = "Fluent"
+        )
+        cls.tp = models.TimePlace.objects.create(
+            user=cls.user,
+            start="2025-12-01T12:00+01:00",
+            end="2025-12-01T15:00+01:00",
+            latitude=10.123456,
+            longitude=10.123456,
+            radius=10,
+            description="I want to count queries",
+        )
+        cls.tp.interests.add(1, 2)
+        cls.tp.activities.add(1, 2)
+
+    def add_candidates(self, count):
+        """Create users with a timeplace that matches self.tp and every
+        second one is too far away to match.
+        """
+        offset = models.TimePlace.objects.count()
+        for i in range(offset, offset + count):
+            user = usermodels.User.objects.create_user(
+                username=f"candidate_{i}",
+                email=f"candidate{i}@stsp.com",
+                password="user@2023",
+            )
+            profile = usermodels.UserProfile.objects.create(
+                user = user,
+                name = f"candidate{i}",
+                hometown = "candidatetown",
+                slogan = "candidateslogan",
+                birthday = "2001-01-01",
+                gender = "D",
+                phone = "111111111",
+                profile_email = f"candidate{i}@stsp.com",
+            )
+            usermodels.UserLanguage.objects.create(
+                userprofile = profile,
+                language = usermodels.Language.objects.get(pk=1),
+                level = "Fluent"
+            )
+            tp = models.TimePlace.objects.create(
+                user=user,
+                start="2025-12-01T13:00+01:00",
+                end="2025-12-01T17:00+01:00",
+                latitude=10.123456,
+                # about 1km or 9km away
+                longitude=10.133456 if i % 2 else 10.203456,
+                radius=5,
+                description=f"I am candidate {i}",
+            )
+            tp.interests.add(i % 2 + 1)
+            tp.activities.add(i % 2 + 1)
+
+    def test_query_count_does_not_grow_with_candidates(self):
+        """Test if the matching endpoint needs the same number of queries
+        for 2, 10 and 50 candidates.
+        """
+        url = reverse("timeplace-matches", args=(self.tp.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        query_counts = []
+        for count in (2, 8, 40):
+            self.add_candidates(count)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            query_counts.append(len(queries))
+        # Only the candidates within 5km are matches
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+    def test_candidates_are_not_queried_on_read(self):
+        """Test if the matches are read from the precomputed candidates
+        without running the candidate query.
+        """
+        self.add_candidates(10)
+        url = reverse("timeplace-matches", args=(self.tp.id,))
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 5)
+        candidate_queries = [query for query in queries
+                             if '"grid_cell" BETWEEN' in query["sql"]]
+        self.assertEqual(len(candidate_queries), 0)
+
+    def test_candidates_follow_changes(self):
+        """Test if the precomputed candidates are updated when a timeplace,
+        its interests or its user's languages change.
+        """
+        self.add_candidates(2)
+        candidate = models.TimePlace.objects.exclude(user=self.user).first()
+        candidates = models.MatchCandidate.objects.filter(timeplace=self.tp)
+        self.assertEqual(candidates.count(), 1)
+        self.assertEqual(candidates.get().score, 2)
+        # Both directions are stored
+        self.assertTrue(models.MatchCandidate.objects
+                        .filter(timeplace=candidate, candidate=self.tp)
+                        .exists())
+        # No shared interest anymore
+        self.tp.interests.remove(2)
+        self.assertEqual(candidates.count(), 0)
+        self.tp.interests.add(2)
+        self.assertEqual(candidates.count(), 1)
+        # No shared language anymore
+        usermodels.UserLanguage.objects.filter(
+            userprofile=self.profile).delete()
+        self.assertEqual(candidates.count(), 0)
+        usermodels.UserLanguage.objects.create(
+            userprofile = self.profile,
+            language = usermodels.Language.objects.get(pk=1),
+            level = "Fluent"
+        )
+        self.assertEqual(candidates.count(), 1)
+        # A match object exists
+        match = matchmodels.Match.objects.create(timeplace_1=candidate,
+                                                 timeplace_2=self.tp)
+        self.assertEqual(candidates.count(), 0)
+        match.delete()
+        self.assertEqual(candidates.count(), 1)
+        # The candidate is deleted
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        url = reverse("timeplace-detail", args=(self.tp.id,))
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(candidates.count(), 0)
+
+    def test_concurrent_refresh_of_a_neighbour(self):
+        """Test if a refresh doesn't fail when a concurrent refresh of the
+        candidate wrote the same pair in the meantime.
+        """
+        self.add_candidates(2)
+        candidate = models.TimePlace.objects.get(longitude=10.133456)
+
+        def concurrent_refresh(timeplace, candidate_ids):
+            models.MatchCandidate.objects.create(
+                timeplace=candidate, candidate=self.tp,
+                start=self.tp.start, distance=0, score=0)
+            return overlap_scores(timeplace, candidate_ids)
+
+        with mock.patch.object(matching, "overlap_scores",
+                               side_effect=concurrent_refresh):
+            matching.refresh_match_candidates(self.tp)
+        row = models.MatchCandidate.objects.get(timeplace=candidate,
+                                                candidate=self.tp)
+        self.assertEqual(row.score, 2)
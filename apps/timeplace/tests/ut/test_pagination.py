@@ -0,0 +1,158 @@
+from base64 import b64encode
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.core.pagination import KeysetPagination
+from apps.timeplace import models
+from apps.user.models import User, UserProfile
+
+
+@mock.patch.object(KeysetPagination, "page_size", 2)
+class TestKeysetPagination(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="user_pages",
+            email="user_pages@stsp.com",
+            password="user@2023",
+        )
+        start = datetime.now(timezone.utc) + timedelta(days=30)
+        cls.timeplaces = models.TimePlace.objects.bulk_create(
+            models.TimePlace(
+                user=cls.user,
+                start=start,
+                end=start + timedelta(hours=3),
+                latitude=52.52,
+                longitude=13.40,
+                grid_cell=0,
+                radius=10,
+                description=f"Page {i}",
+            ) for i in range(5))
+        # Same creation time for all of them, the id decides the order
+        models.TimePlace.objects.filter(user=cls.user).update(
+            created_at=start)
+        UserProfile.objects.create(user=cls.user, name="Pages",
+                                   birthday="2000-01-01", gender="D")
+        models.MatchCandidate.objects.bulk_create(
+            models.MatchCandidate(
+                timeplace=cls.timeplaces[0], candidate=candidate,
+                start=candidate.start, distance=0, score=1,
+            ) for candidate in cls.timeplaces[1:])
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = reverse("timeplace-list")
+
+    def test_cursor_pages(self):
+        """Test if following the cursors lists every timeplace once in a
+        stable order without counting the rows.
+        """
+        ids = []
+        response = self.client.get(self.url, {"cursor": ""})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids += [tp["id"] for tp in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data["next"])
+            self.assertFalse(any("COUNT(" in query["sql"]
+                                 for query in queries.captured_queries))
+        self.assertEqual(ids, sorted((tp.id for tp in self.timeplaces),
+                                     reverse=True))
+
+    def test_cursor_is_the_whole_key(self):
+        """Test if rows with the same first value of the ordering are paged
+        by their position in the whole ordering, without an OFFSET, in both
+        directions.
+        """
+        url = reverse("timeplace-matches", args=(self.timeplaces[0].id,))
+        ids, pages = [], []
+        response = self.client.get(url, {"cursor": ""})
+        while True:
+            ids += [tp["id"] for tp in response.data["results"]]
+            pages.append(response)
+            if response.data["next"] is None:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data["next"])
+            self.assertFalse(any("OFFSET" in query["sql"]
+                                 for query in queries.captured_queries))
+        # All candidates start at the same time
+        self.assertEqual(ids, [tp.id for tp in self.timeplaces[1:]])
+        response = self.client.get(pages[-1].data["previous"])
+        self.assertEqual(response.data["results"], pages[0].data["results"])
+
+    def test_invalid_cursor(self):
+        """Test if cursors that aren't a position of the ordering are
+        refused.
+        """
+        for position in ("[1]", '["no date", 1]', "no json"):
+            cursor = b64encode(f"p={position}".encode()).decode()
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_numbers_stay_available(self):
+        """Test if lists without a cursor are paged with page numbers
+        unless cursors are the default.
+        """
+        response = self.client.get(self.url, {"page": 3})
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual([tp["id"] for tp in response.data["results"]],
+                         [self.timeplaces[0].id])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 5)
+        with override_settings(KEYSET_PAGINATION_DEFAULT=True):
+            response = self.client.get(self.url)
+            self.assertNotIn("count", response.data)
+            self.assertIn("cursor=", response.data["next"])
+            # Page numbers can still be requested
+            response = self.client.get(self.url, {"page": 1})
+            self.assertEqual(response.data["count"], 5)
+
+    def test_matches_without_count(self):
+        """Test if the matches can be paged without counting them and the
+        next page is found by fetching one more row.
+        """
+        url = reverse("timeplace-matches", args=(self.timeplaces[0].id,))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"count": "none"})
+        self.assertFalse(any("COUNT(" in query["sql"]
+                             for query in queries.captured_queries))
+        self.assertIsNone(response.data["count"])
+        self.assertIsNone(response.data["previous"])
+        self.assertEqual([tp["id"] for tp in response.data["results"]],
+                         [tp.id for tp in self.timeplaces[1:3]])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([tp["id"] for tp in response.data["results"]],
+                         [tp.id for tp in self.timeplaces[3:]])
+        self.assertIsNone(response.data["next"])
+        self.assertNotIn("page=", response.data["previous"])
+
+        response = self.client.get(url, {"count": "none", "page": 3})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_matches_estimated_count(self):
+        """Test if the matches can be listed with an estimated total and
+        still with the exact one. Only PostgreSQL can estimate it.
+        """
+        url = reverse("timeplace-matches", args=(self.timeplaces[0].id,))
+        response = self.client.get(url, {"count": "estimate"})
+        if connection.vendor == "postgresql":
+            self.assertIsInstance(response.data["count"], int)
+        else:
+            self.assertIsNone(response.data["count"])
+        self.assertIn("page=2", response.data["next"])
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["count"], 4)
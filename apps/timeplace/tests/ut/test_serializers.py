@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.core.serializers import CompiledReadMixin
+from apps.match.models import Match
+from apps.match.serializers import MatchModelListRetrieveSerializer
+from apps.timeplace import models, serializers
+from apps.user import models as usermodels
+
+
+class TestCompiledSerializers(TestCase):
+    """The compiled read path has to give the same output as DRF."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = []
+        cls.timeplaces = []
+        for i in range(2):
+            user = usermodels.User.objects.create_user(
+                username=f"user_{i}",
+                email=f"user{i}@stsp.com",
+                password="user@2023",
+                title="Tester" if i else None,
+            )
+            usermodels.UserProfile.objects.create(
+                user = user,
+                name = f"user{i}",
+                hometown = "usertown",
+                slogan = "userslogan",
+                birthday = "2001-01-01",
+                gender = "D",
+                phone = "111111111",
+                profile_email = f"user{i}@stsp.com",
+            )
+            timeplace = models.TimePlace.objects.create(
+                user=user,
+                start="2025-12-01T12:00+01:00",
+                end="2025-12-01T15:00+01:00",
+                latitude=-10.123456,
+                longitude=170.5,
+                radius=10,
+                # the first one has no city
+                city="Berlin" if i else None,
+                description=f"I want to be serialized {i}",
+            )
+            timeplace.interests.add(1, 2)
+            timeplace.activities.add(i + 1)
+            cls.users.append(user)
+            cls.timeplaces.append(timeplace)
+        Match.objects.create(
+            timeplace_1=cls.timeplaces[0],
+            timeplace_2=cls.timeplaces[1],
+            email_user_2=True,
+        )
+
+    def assert_same_output(self, serialize):
+        with mock.patch.object(CompiledReadMixin, "compiled", False):
+            expected = serialize()
+        self.assertEqual(serialize(), expected)
+
+    def test_timeplace_view_serializer(self):
+        timeplaces = models.TimePlace.objects.order_by("id")
+        self.assert_same_output(lambda: (
+            serializers.TimePlaceModelViewSerializer(timeplaces, many=True).data))
+
+    def test_timeplace_match_serializer(self):
+        timeplaces = models.TimePlace.objects.order_by("id")
+        self.assert_same_output(lambda: (
+            serializers.TimePlaceMatchSerializer(timeplaces, many=True).data))
+
+    def test_match_serializer(self):
+        for user in self.users:
+            context = {"request": SimpleNamespace(user=user)}
+            self.assert_same_output(lambda: MatchModelListRetrieveSerializer(
+                Match.objects.all(), many=True, context=context).data)
+
+    def test_user_without_profile(self):
+        """Test if a user who has no profile yet gives no name instead of
+        an error.
+        """
+        user = usermodels.User.objects.create_user(
+            username="no_profile",
+            email="noprofile@stsp.com",
+            password="user@2023",
+        )
+        timeplace = models.TimePlace.objects.create(
+            user=user,
+            start="2025-12-01T12:00+01:00",
+            end="2025-12-01T15:00+01:00",
+            latitude=-10.123456,
+            longitude=170.5,
+            radius=10,
+            description="I have no profile",
+        )
+        Match.objects.create(timeplace_1=self.timeplaces[0],
+                             timeplace_2=timeplace)
+        data = serializers.TimePlaceMatchSerializer(timeplace).data
+        self.assertIsNone(data["username"])
+        self.assert_same_output(lambda: (
+            serializers.TimePlaceMatchSerializer(timeplace).data))
+        for user in (self.users[0], user):
+            context = {"request": SimpleNamespace(user=user)}
+            self.assert_same_output(lambda: MatchModelListRetrieveSerializer(
+                Match.objects.all(), many=True, context=context).data)
@@ -0,0 +1,112 @@
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from apps.core.gazetteer import build_gazetteer
+from apps.core.utils import GeocodingError
+from apps.timeplace import models, tasks
+from apps.user.models import User
+
+
+class InlineExecutor:
+    """Runs the lookups right away in the test's transaction."""
+    def submit(self, fn, timeplace_ids):
+        for timeplace_id in timeplace_ids:
+            tasks.fill_city(timeplace_id)
+
+
+@override_settings(GEOCODING_QUEUE="thread", GEOCODING_BACKOFF=0,
+                   GAZETTEER_PATH=None)
+class TestCityLookup(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="user_1",
+            email="user1@stsp.com",
+            password="user@2023",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.tp = models.TimePlace.objects.create(
+            user=cls.user,
+            start="2025-12-01T12:00+01:00",
+            end="2025-12-01T15:00+01:00",
+            latitude=52.52,
+            longitude=13.40,
+            radius=10,
+            description="I need a city",
+            city_pending=True,
+        )
+
+    @mock.patch.object(tasks, "lookup_nearest_city",
+                       side_effect=[GeocodingError("timeout"), "Berlin"])
+    def test_failed_lookup_is_retried(self, lookup):
+        """Test if a failed lookup is tried again and the city is saved.
+        """
+        self.assertTrue(tasks.fill_city(self.tp.id))
+        self.assertEqual(lookup.call_count, 2)
+        self.tp.refresh_from_db()
+        self.assertEqual(self.tp.city, "Berlin")
+        self.assertFalse(self.tp.city_pending)
+
+    @override_settings(GEOCODING_RETRIES=2)
+    @mock.patch.object(tasks, "lookup_nearest_city",
+                       side_effect=GeocodingError("timeout"))
+    def test_lookup_stays_pending(self, lookup):
+        """Test if the lookup stays pending after all attempts failed.
+        """
+        self.assertFalse(tasks.fill_city(self.tp.id))
+        self.assertEqual(lookup.call_count, 2)
+        self.tp.refresh_from_db()
+        self.assertIsNone(self.tp.city)
+        self.assertTrue(self.tp.city_pending)
+
+    def post_timeplace(self):
+        start = datetime.now(timezone.utc) + timedelta(days=30)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        return self.client.post(reverse("timeplace-list"), {
+            "start": start.isoformat(),
+            "end": (start + timedelta(hours=3)).isoformat(),
+            "latitude": 52.52,
+            "longitude": 13.40,
+            "radius": 10,
+            "description": "Where am I?",
+            "interests": [1],
+            "activities": [1],
+        }, format="json")
+
+    @mock.patch.object(tasks, "get_executor", return_value=InlineExecutor())
+    @mock.patch.object(tasks, "lookup_nearest_city", return_value="Berlin")
+    def test_create_looks_up_city_after_commit(self, lookup, executor):
+        """Test if creating a timeplace returns without a city and the
+        city is looked up after the transaction is committed.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_timeplace()
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertIsNone(response.data["city"])
+            lookup.assert_not_called()
+        timeplace = models.TimePlace.objects.get(pk=response.data["id"])
+        self.assertEqual(timeplace.city, "Berlin")
+        self.assertFalse(timeplace.city_pending)
+
+    @mock.patch.object(tasks, "lookup_nearest_city")
+    def test_create_uses_gazetteer(self, lookup):
+        """Test if the city is filled right away with an offline gazetteer.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "gazetteer.bin"
+            build_gazetteer([("Berlin", 52.52437, 13.41053)], path)
+            with override_settings(GAZETTEER_PATH=path), \
+                    self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = self.post_timeplace()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["city"], "Berlin")
+        self.assertEqual(len(callbacks), 0)
+        lookup.assert_not_called()
@@ -1,31 +1,37 @@
 from datetime import datetime, timezone
-from decimal import Decimal
 
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Q, prefetch_related_objects
 from rest_framework import viewsets
 from rest_framework import status
 from rest_framework import serializers as drf_serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from geopy.distance import distance
 from drf_spectacular.utils import extend_schema, extend_schema_view, inline_serializer
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, OpenApiResponse
 
+from apps.core.catalog import CatalogListMixin
+from apps.core.pagination import CountlessKeysetPagination, KeysetPagination
+from apps.core.views import ConditionalGetMixin
 from apps.match.models import Match
 from apps.match.serializers import MatchModelListRetrieveSerializer
-from . import models, permissions, serializers
+from . import catalogs, models, permissions, serializers
 
 
-class InterestViewSet(viewsets.ModelViewSet):
+class InterestViewSet(CatalogListMixin, ConditionalGetMixin,
+                      viewsets.ModelViewSet):
     permission_classes = (permissions.SuperOrReadOnly,)
+    catalog = catalogs.INTERESTS
 
     queryset = models.Interest.objects.all().order_by("name")
 
     serializer_class = serializers.InterestModelSerializer
 
 
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(CatalogListMixin, ConditionalGetMixin,
+                      viewsets.ModelViewSet):
     permission_classes = (permissions.SuperOrReadOnly,)
+    catalog = catalogs.ACTIVITIES
 
     queryset = models.Activity.objects.all().order_by("name")
 
@@ -47,8 +53,9 @@ class TimePlaceViewSet(viewsets.ModelViewSet):
         models.TimePlace.objects.all()
         .select_related("user")
         .prefetch_related("interests", "activities")
-        .order_by("-created_at")
+        .order_by("-created_at", "-id")
     )
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         """Use the CreateSerializer for create and the UpdateSerializer for 
@@ -84,84 +91,50 @@ class TimePlaceViewSet(viewsets.ModelViewSet):
             return self.queryset
         return self.queryset.filter(user=self.request.user).filter(deleted=False)
 
-    def check_match(self, main_tp, check_tp):
-        """Checks if two timeplaces are a match.
-
-        Args:
-            main_tp (TimePlace): The main timeplace to check against.
-            check_tp (TimePlace): The potential match to check.
-
-        Returns:
-            bool: True if match, False if not.
+    @extend_schema(
+        description="""Create a list of TimePlaces at once.
+        Either all of them are created or none, the errors are returned
+        in the order of the list.""",
+        request=serializers.TimePlaceModelCreateSerializer(many=True),
+        responses={201: serializers.TimePlaceModelViewSerializer(many=True)})
+    @action(detail=False, methods=["POST"], url_path="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        """Create up to TIMEPLACE_BULK_CREATE_MAX TimePlaces of the logged
+        in user in one transaction
         """
-        # Check if there is at least one overlapping interest
-        if not main_tp.interests.all().intersection(check_tp.interests.all()):
-            return False
-        # Check if there is at least one overlapping activity
-        if not main_tp.activities.all().intersection(check_tp.activities.all()):
-            return False
-        # Check if the distance between the timeplaces is within the smallest radius
-        radius = min(main_tp.radius, check_tp.radius)
-        if radius < distance((main_tp.latitude, main_tp.longitude),
-                             (check_tp.latitude, check_tp.longitude)).km:
-            return False
-        check_query = (Match.objects
-                    .filter((Q(timeplace_1=main_tp) |
-                            Q(timeplace_2=main_tp)) &
-                            (Q(timeplace_1=check_tp) |
-                            Q(timeplace_2=check_tp))
-                    ))
-        if check_query:
-            return False
-        return True
-    
+        serializer = serializers.TimePlaceModelCreateSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=settings.TIMEPLACE_BULK_CREATE_MAX,
+            context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @extend_schema(responses=serializers.TimePlaceMatchSerializer(many=True))
-    @action(detail=True, methods=["GET"], url_path="matches")
+    @action(detail=True, methods=["GET"], url_path="matches",
+            pagination_class=CountlessKeysetPagination)
     def matches(self, request, *args, **kwargs):
         """View all potential matches of a Timeplace
         """
         # the TimePlace this view belongs to
         obj = self.get_object()
-        # get the list of language ids to filter the queryset with
-        obj_langs = [lang[0] for lang in obj.user.userprofile.languages.values_list()]
-
-
-        # get all timeplaces with overlapping timeframe and lat/long
-        queryset = (models.TimePlace.objects
-                    .select_related("user", "user__userprofile")
-                    .prefetch_related("interests", "activities",
-                                      "user__userprofile__languages")
-                    # excludes results by the same user
-                    .exclude(user=obj.user)
-                    .exclude(deleted=True)
-                    .filter(
-                        # filter start and end time to be less/greater than obj
-                        start__lte = obj.end,
-                        end__gte = obj.start,
-                        # .1° is about 11km, so dividing the radius by 100
-                        latitude__lte = obj.latitude + Decimal(obj.radius/100),
-                        latitude__gte = obj.latitude - Decimal(obj.radius/100),
-                        longitude__lte = obj.longitude + Decimal(obj.radius/100),
-                        longitude__gte = obj.longitude - Decimal(obj.radius/100),
-                        user__userprofile__languages__id__in = obj_langs,
+        # the potential matches are precomputed whenever a timeplace changes
+        queryset = (models.MatchCandidate.objects
+                    .filter(timeplace=obj)
+                    .select_related("candidate__user__userprofile")
+                    .order_by("start", "candidate")
                     )
-                    .distinct()
-                    .order_by("start")
-                )
-        # Check each potential match for distance, interests and activities
-        non_matches = []
-        for tp in queryset:
-            if not self.check_match(obj, tp):
-                non_matches.append(tp.id)
-        # Exclude the results that don't match
-        queryset = queryset.exclude(id__in=non_matches)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = serializers.TimePlaceMatchSerializer(page, many=True)
+            matches = [row.candidate for row in page]
+            prefetch_related_objects(matches, "interests", "activities")
+            serializer = serializers.TimePlaceMatchSerializer(matches, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = serializers.TimePlaceMatchSerializer(queryset, many=True)
+        matches = [row.candidate for row in queryset]
+        prefetch_related_objects(matches, "interests", "activities")
+        serializer = serializers.TimePlaceMatchSerializer(matches, many=True)
         return Response(serializer.data)
 
     @extend_schema(
@@ -259,8 +232,10 @@ class TimePlaceViewSet(viewsets.ModelViewSet):
                     .exclude(deleted=True)
                     .filter(Q(timeplace_1=timeplace) |
                             Q(timeplace_2=timeplace))
-                    .order_by("-created_at")
+                    .order_by("-created_at", "-id")
                     )
+        queryset = MatchModelListRetrieveSerializer.setup_eager_loading(
+            queryset, request.user)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.user"
+
+    def ready(self):
+        # Keep UserProfile.modified_at and the token cache up to date
+        from . import signals  # noqa: F401
+        from .catalogs import LANGUAGES
+        LANGUAGES.connect()
@@ -0,0 +1,47 @@
+import copy
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from apps.core.cache import LRUCache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that keeps the user of a token in memory for
+    AUTH_TOKEN_CACHE_TTL seconds instead of querying the token and the user
+    on every request.
+
+    Entries are removed when the token is deleted or the user is saved or
+    deleted in this process, see signals.py. Other processes keep a
+    deactivated user for the TTL at the latest.
+    """
+    _cache = None
+
+    @classmethod
+    def get_cache(cls) -> LRUCache:
+        if cls._cache is None:
+            cls._cache = LRUCache(settings.AUTH_TOKEN_CACHE_SIZE,
+                                  settings.AUTH_TOKEN_CACHE_TTL)
+        return cls._cache
+
+    @classmethod
+    def invalidate(cls, key: str):
+        """Remove a token from the cache."""
+        cls.get_cache().delete(key)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Get the hits, misses, hit rate and size of the cache."""
+        return cls.get_cache().stats()
+
+    def authenticate_credentials(self, key):
+        cache = self.get_cache()
+        cached = cache.get(key)
+        if cached is None:
+            # Raises AuthenticationFailed for unknown tokens and inactive
+            # users, which are not cached
+            cached = super().authenticate_credentials(key)
+            cache.set(key, cached)
+        user, token = cached
+        # Every request gets its own instances that it may change
+        return copy.copy(user), copy.copy(token)
@@ -1,14 +1,43 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Case, Q, When
+from django.db.models.functions import Lower
 
 class EmailOrUsernameModelBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
+        """Find the user by email or username with one query that uses the
+        lowercase indexes of the user table. The token of the user is
+        loaded with it, see UserLoginView.
+
+        Usernames are only unique with their case, so an exact match comes
+        before one that only matches in lowercase, and the oldest account
+        before newer ones.
+        """
+        if username is None or password is None:
+            return None
         UserModel = get_user_model()
+        exact, username = username, username.lower()
 
-        try:
-            user = UserModel.objects.get(email=username)
-        except UserModel.DoesNotExist:
-            user = UserModel.objects.filter(username=username).first()
+        users = (UserModel.objects
+                 .select_related("auth_token")
+                 .alias(username_lower=Lower("username")))
+        if "@" in username:
+            # Usernames may contain an @ too, an email match comes first
+            users = (users
+                     .alias(email_lower=Lower("email"))
+                     .filter(Q(email_lower=username)
+                             | Q(username_lower=username))
+                     .order_by(Case(When(email=exact, then=0),
+                                    When(email_lower=username, then=1),
+                                    When(username=exact, then=2),
+                                    default=3),
+                               "pk"))
+        else:
+            users = (users
+                     .filter(username_lower=username)
+                     .order_by(Case(When(username=exact, then=0), default=1),
+                               "pk"))
+        user = users.first()
 
         if user is not None and user.check_password(password):
             return user
@@ -0,0 +1,4 @@
+from apps.core.catalog import Catalog
+from . import models
+
+LANGUAGES = Catalog(models.Language, fields=("id", "lang"), order_by=("id",))
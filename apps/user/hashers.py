@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with the number of iterations of PASSWORD_PBKDF2_ITERATIONS.
+    Hashes with a different number are rehashed on the next login.
+    """
+    @property
+    def iterations(self) -> int:
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 with the time and memory cost of PASSWORD_ARGON2_TIME_COST and
+    PASSWORD_ARGON2_MEMORY_COST (KiB). Needs argon2-cffi.
+    """
+    @property
+    def time_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_MEMORY_COST
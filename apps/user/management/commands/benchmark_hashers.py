@@ -0,0 +1,43 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ("Measure the password hashers of PASSWORD_HASHERS. A login "
+            "verifies one hash, so hashes per second and core is the login "
+            "capacity of a core.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10,
+                            help="Number of hashes per hasher")
+        parser.add_argument("--target-ms", type=float, default=None,
+                            help="Suggest PBKDF2 iterations for this time "
+                                 "per hash")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        password = "benchmark@2023"
+        for i, hasher in enumerate(get_hashers()):
+            try:
+                encoded = hasher.encode(password, hasher.salt())
+            except ValueError:
+                # the library of the hasher isn't installed
+                self.stdout.write(f"{hasher.algorithm:<22}not available")
+                continue
+            start = perf_counter()
+            for _ in range(count):
+                hasher.verify(password, encoded)
+            seconds = (perf_counter() - start) / count
+            self.stdout.write(
+                f"{hasher.algorithm:<22}{seconds * 1000:>8.1f} ms"
+                f"{1 / seconds:>8.1f} hashes/s per core"
+                + ("  (new passwords)" if i == 0 else ""))
+            if options["target_ms"] and hasher.algorithm == "pbkdf2_sha256":
+                iterations = int(settings.PASSWORD_PBKDF2_ITERATIONS
+                                 * options["target_ms"] / 1000 / seconds)
+                self.stdout.write(
+                    f"PASSWORD_PBKDF2_ITERATIONS = {iterations} takes about "
+                    f"{options['target_ms']:.0f} ms")
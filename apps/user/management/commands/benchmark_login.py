@@ -0,0 +1,61 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from apps.user.models import User
+from apps.user.views import UserLoginView
+
+
+class Command(BaseCommand):
+    help = ("Measure the login endpoint: time per login, the part of it "
+            "spent hashing the password and the number of queries. The "
+            "user is created in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20,
+                            help="Number of logins")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        view = UserLoginView.as_view({"post": "create"})
+        factory = APIRequestFactory()
+        password = "benchmark@2023"
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username="benchmark_login",
+                email="benchmark_login@stsp.com",
+                password=password,
+            )
+            # the first login creates the token
+            view(factory.post("/api/v1/login", {
+                "username": user.username, "password": password}))
+
+            results = []
+            for name, login in (("username", user.username),
+                                ("email", user.email.upper())):
+                request = factory.post("/api/v1/login", {
+                    "username": login, "password": password})
+                start = perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(count):
+                        response = view(request)
+                seconds = perf_counter() - start
+                assert response.status_code == 200, response.data
+                results.append((name, seconds, len(queries)))
+
+            start = perf_counter()
+            for _ in range(count):
+                user.check_password(password)
+            hashing = (perf_counter() - start) / count
+            transaction.set_rollback(True)
+
+        for name, seconds, queries in results:
+            self.stdout.write(
+                f"login by {name:<10}{seconds / count * 1000:>8.1f} ms"
+                f"{queries / count:>6.1f} queries"
+                f"{count / seconds:>8.1f} logins/s")
+        self.stdout.write(f"password hashing{hashing * 1000:>10.1f} ms")
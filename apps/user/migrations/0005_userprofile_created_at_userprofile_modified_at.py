@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_prefill_languages"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
+
+from apps.core.models import CreatedModifiedDateTimeBase
 
 
 class User(AbstractUser):
@@ -9,6 +12,13 @@ class User(AbstractUser):
     )
     bio = models.TextField(default="", blank=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Logins look up the lowercase username or email
+            models.Index(Lower("username"), name="user_username_lower_idx"),
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
+
 
 class Language(models.Model):
     lang = models.CharField(max_length=255)
@@ -17,7 +27,10 @@ class Language(models.Model):
         return self.lang
 
 
-class UserProfile(models.Model):
+class UserProfile(CreatedModifiedDateTimeBase):
+    """Profile of a user. modified_at also changes when the user or the
+    languages of the profile change, see signals.py.
+    """
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
     hometown = models.CharField(max_length=255)
@@ -2,10 +2,12 @@ from rest_framework import serializers
 
 from datetime import date
 
-from . import models
+from apps.core.catalog import CatalogNameField
+from apps.core.serializers import CompiledReadMixin
+from . import catalogs, models
 
 
-class UserModelSerializer(serializers.ModelSerializer):
+class UserModelSerializer(CompiledReadMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     def create(self, validated_data):
@@ -38,7 +40,9 @@ class LanguageModelSerializer(serializers.ModelSerializer):
 
 
 class UserLanguageModelSerializer(serializers.ModelSerializer):
-    language = serializers.StringRelatedField()
+    # The name is read from memory instead of loading the language
+    language = CatalogNameField(catalogs.LANGUAGES, "lang",
+                                source="language_id")
 
     class Meta:
         model = models.UserLanguage
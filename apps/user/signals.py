@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import models
+from .authentication import CachedTokenAuthentication
+
+
+def touch_profile(**lookup):
+    """Set modified_at of a profile, its output includes the user and the
+    languages."""
+    models.UserProfile.objects.filter(**lookup).update(
+        modified_at=timezone.now())
+
+
+@receiver(post_save, sender=models.User)
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins only update last_login and rehash the password, neither is
+    # part of the profile
+    if raw or (update_fields
+               and set(update_fields) <= {"last_login", "password"}):
+        return
+    touch_profile(user=instance)
+
+
+@receiver(post_save, sender=models.UserLanguage)
+@receiver(post_delete, sender=models.UserLanguage)
+def user_language_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    touch_profile(pk=instance.userprofile_id)
+
+
+@receiver(post_save, sender=models.User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached user of the token, e.g. if it was deactivated."""
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+    for key in Token.objects.filter(user=instance).values_list("key",
+                                                              flat=True):
+        CachedTokenAuthentication.invalidate(key)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    CachedTokenAuthentication.invalidate(instance.key)
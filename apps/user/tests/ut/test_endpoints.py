@@ -5,6 +5,7 @@ from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
 
+from apps.user.authentication import CachedTokenAuthentication
 from apps.user.models import User, UserProfile, Language
 
 
@@ -480,3 +481,228 @@ class TestUserLogin(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data["token"])
+
+    def test_login_is_one_query(self):
+        """Tests that the user and its token are loaded with one query
+        """
+        user = User.objects.create_user(
+            username="onequery",
+            email="onequery@example.com",
+            password="testpassword",
+        )
+        token = Token.objects.create(user=user)
+        url = reverse("login-token")
+        for login in ("OneQuery", "OneQuery@example.com"):
+            with self.assertNumQueries(1):
+                response = self.client.post(
+                    url,
+                    data={
+                        "username": login,
+                        "password": "testpassword",
+                    },
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["token"], token.key)
+
+    def test_login_prefers_email(self):
+        """Tests that an email is matched before a username that looks
+        like the same email
+        """
+        User.objects.create_user(
+            username="prefer@example.com",
+            email="other@example.com",
+            password="otherpassword",
+        )
+        User.objects.create_user(
+            username="prefer",
+            email="prefer@example.com",
+            password="testpassword",
+        )
+        response = self.client.post(
+            reverse("login-token"),
+            data={
+                "username": "prefer@example.com",
+                "password": "testpassword",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_prefers_exact_username(self):
+        """Tests that a username that differs only in case from another one
+        logs in to its own account, and the oldest one is used otherwise
+        """
+        first = User.objects.create_user(
+            username="Bob",
+            email="bob1@example.com",
+            password="firstpassword",
+        )
+        second = User.objects.create_user(
+            username="bob",
+            email="bob2@example.com",
+            password="secondpassword",
+        )
+        url = reverse("login-token")
+        for login, password, user in (("bob", "secondpassword", second),
+                                      ("Bob", "firstpassword", first),
+                                      ("BOB", "firstpassword", first)):
+            response = self.client.post(
+                url,
+                data={
+                    "username": login,
+                    "password": password,
+                },
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(Token.objects.get(key=response.data["token"])
+                             .user, user)
+        response = self.client.post(
+            url,
+            data={
+                "username": "Bob",
+                "password": "secondpassword",
+            },
+        )
+        self.assertNotEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestProfileConditionalGet(APITestCase):
+    """
+    Tests for the ETag and Last-Modified headers of the profile endpoints.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="conditional",
+            password="testpassword",
+            email="conditional@example.com",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.profile = UserProfile.objects.create(
+            user=cls.user,
+            name='Conditional User',
+            hometown='Test Hometown',
+            slogan='Test Slogan',
+            birthday='1990-01-01',
+            gender='M',
+            phone='1234567890',
+            profile_email='conditional@example.com'
+        )
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.url = reverse("userprofile-detail", args=(self.profile.id,))
+
+    def test_unchanged_profile_is_not_modified(self):
+        """Test if a request with the ETag or the Last-Modified date of the
+        profile gets a 304 without loading the related objects.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("no-cache", response["Cache-Control"])
+        # the profile, the token is cached
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        not_modified = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_modify_the_profile(self):
+        """Test if changes of the user or the languages change the ETag of
+        the profile.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        self.user.bio = "New bio"
+        self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["bio"], "New bio")
+
+        etag = response["ETag"]
+        self.profile.user_language.create(
+            language=Language.objects.get(pk=1), level="Fluent")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["languages"]), 1)
+
+    def test_list_is_not_modified(self):
+        """Test if the profile list gets a 304 until a profile changes.
+        """
+        url = reverse("userprofile-list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(self.url, {"slogan": "New slogan"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["slogan"], "New slogan")
+
+    def test_list_has_no_date(self):
+        """Test if the profile list has no Last-Modified date, a date can't
+        tell that a row was removed.
+        """
+        response = self.client.get(reverse("userprofile-list"))
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("Last-Modified", self.client.get(self.url))
+
+    def test_language_names_modify_the_profile(self):
+        """Test if renaming a language of the profile changes its ETag.
+        """
+        language = Language.objects.get(pk=1)
+        self.profile.user_language.create(language=language, level="Fluent")
+        etag = self.client.get(self.url)["ETag"]
+        language.lang = "Renamed"
+        language.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["languages"][0]["language"], "Renamed")
+
+
+class TestCachedTokenAuthentication(APITestCase):
+    """
+    Tests for the token cache of the authentication.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="cached",
+            password="testpassword",
+            email="cached@example.com",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        CachedTokenAuthentication.get_cache().clear()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.url = reverse("user-list")
+
+    def test_token_is_cached(self):
+        """Test if the token is only queried on the first request.
+        """
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(CachedTokenAuthentication.stats()["hits"], 1)
+        self.assertEqual(CachedTokenAuthentication.stats()["hit_rate"], 0.5)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test if a deactivated user can't use a cached token anymore.
+        """
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        """Test if a deleted token can't be used anymore.
+        """
+        self.client.get(self.url)
+        Token.objects.filter(user=self.user).delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,53 @@
+from django.contrib.auth.hashers import make_password
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.user.models import User
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class TestPasswordHashers(APITestCase):
+    """Tests for the rehashing of passwords on login
+    """
+    def login(self, user):
+        response = self.client.post(
+            reverse("login-token"),
+            data={
+                "username": user.username,
+                "password": "testpassword",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+
+    def test_new_password_uses_configured_iterations(self):
+        """Tests that new passwords are hashed with the configured work
+        factor
+        """
+        user = User.objects.create_user(
+            username="hashed", email="hashed@example.com",
+            password="testpassword")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+    def test_login_rehashes_with_new_iterations(self):
+        """Tests that a password is rehashed on login after the work factor
+        changed
+        """
+        user = User.objects.create_user(
+            username="rehashed", email="rehashed@example.com",
+            password="testpassword")
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.login(user)
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_login_upgrades_other_hasher(self):
+        """Tests that a password of another hasher is rehashed with the
+        first hasher on login
+        """
+        user = User.objects.create(
+            username="upgraded", email="upgraded@example.com",
+            password=make_password("testpassword", hasher="scrypt"))
+        self.login(user)
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
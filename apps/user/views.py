@@ -1,4 +1,7 @@
+from datetime import date, datetime, time
+
 from django.contrib.auth import authenticate
+from django.utils import timezone
 
 from rest_framework import viewsets
 from rest_framework import status
@@ -6,7 +9,10 @@ from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
+from apps.core.catalog import CatalogListMixin
+from apps.core.views import ConditionalGetMixin
 from . import serializers
+from .catalogs import LANGUAGES
 from .models import User, UserProfile, UserLanguage, Language
 # from .serializers import UserModelSerializer, UserProfileModelSerializer, UserProfileUpdateSerializer, UserProfileCreateSerializer, UserLoginSerializer, UserLanguageModelSerializer
 from .permissions import UserSuperDeleteOnly
@@ -25,7 +31,8 @@ class UserLoginView(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        username = serializer.validated_data['username'].lower()
+        # the backend matches the case first and lowercase after that
+        username = serializer.validated_data['username']
         password = serializer.validated_data['password']
 
         user = authenticate(
@@ -38,7 +45,11 @@ class UserLoginView(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
+        try:
+            # loaded with the user by the authentication backend
+            token = user.auth_token
+        except Token.DoesNotExist:
+            token, _ = Token.objects.get_or_create(user=user)
 
         return Response(
             {"token": token.key},
@@ -69,11 +80,21 @@ class ListUsers(viewsets.ModelViewSet):
             return User.objects.filter(id=self.request.user.id)
 
 
-class UserProfileModelViewSet(viewsets.ModelViewSet):
-    queryset = UserProfile.objects.all().order_by("user")
+class UserProfileModelViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = UserProfile.objects.select_related("user").order_by("user")
     permission_classes = (
         IsAuthenticatedCreateOrSuperOrAuthor,
     )
+    # The languages are output with their names
+    catalogs = (LANGUAGES,)
+
+    def get_last_modified(self, last_modified):
+        """The age in the output changes at midnight."""
+        if last_modified is None:
+            return None
+        midnight = timezone.make_aware(
+            datetime.combine(date.today(), time.min))
+        return max(last_modified, midnight)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -125,7 +146,8 @@ class UserLanguageViewSet(viewsets.ModelViewSet):
                     .order_by("language"))
 
 
-class LanguageViewSet(viewsets.ModelViewSet):
+class LanguageViewSet(CatalogListMixin, viewsets.ModelViewSet):
     queryset = Language.objects.all()
     serializer_class = serializers.LanguageModelSerializer  
-    permission_classes = [SuperOrReadOnly] 
+    permission_classes = [SuperOrReadOnly]
+    catalog = LANGUAGES 
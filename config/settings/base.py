@@ -14,6 +14,7 @@ DEFAULT_APPS = [
 ]
 
 CUSTOM_APPS = [
+    "apps.core",
     "apps.user",
     "apps.timeplace",
     "apps.match",
@@ -29,6 +30,23 @@ INSTALLED_APPS = [*DEFAULT_APPS, *CUSTOM_APPS, *THIRD_PARTY_APPS]
 
 AUTHENTICATION_BACKENDS = ['apps.user.backends.EmailOrUsernameModelBackend']
 
+# The first hasher hashes new passwords, the others verify older hashes,
+# which are rehashed with the first one on the next login. To use Argon2,
+# install argon2-cffi and move its hasher to the top.
+# 'manage.py benchmark_hashers' shows the cost of the hashers.
+PASSWORD_HASHERS = [
+    "apps.user.hashers.PBKDF2PasswordHasher",
+    "apps.user.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+# Every login takes about as long as one hash, which sets the number of
+# logins per second and core
+PASSWORD_PBKDF2_ITERATIONS = 600000
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 102400
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -61,13 +79,85 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "apps.user.authentication.CachedTokenAuthentication",
     ]
 }
 
+# Page the timeplace and match lists with cursors even if the request has
+# no 'cursor' parameter, see apps/core/pagination.py. Off until the clients
+# have moved from the page numbers.
+KEYSET_PAGINATION_DEFAULT = False
+
+# Tokens whose user is kept in memory, see apps/user/authentication.py
+AUTH_TOKEN_CACHE_SIZE = 10000
+# Seconds until a deactivated user is logged out in other processes
+AUTH_TOKEN_CACHE_TTL = 60
+
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Reverse geocoding of TimePlace.city, see apps/timeplace/tasks.py
+# "thread": look up the city in a thread pool of the web process
+# "db": only mark the timeplace, 'manage.py fill_cities' does the lookup
+GEOCODING_QUEUE = "thread"
+GEOCODING_WORKERS = 2
+GEOCODING_RETRIES = 3
+# Seconds to wait after the first failed attempt, doubled after each attempt
+GEOCODING_BACKOFF = 1
+# Coordinates are rounded to cells of this size in degrees (about 5km),
+# which share their cached nearest city
+GEOCODING_CACHE_CELL = 0.05
+# Number of cells kept in memory by each process
+GEOCODING_CACHE_SIZE = 4096
+# Seconds until a cached city is looked up again
+GEOCODING_CACHE_TTL = 60 * 60 * 24 * 30
+# Seconds the interest, activity and language catalogs are kept in memory
+# without a reload, see apps/core/catalog.py
+CATALOG_TTL = 300
+# Seconds clients may cache the catalog lists
+CATALOG_MAX_AGE = 60
+# HTTP client of the GeoDB API, see apps/core/geoclient.py
+GEODB_TIMEOUT = 2
+# Idle keep-alive connections per process
+GEODB_POOL_SIZE = 4
+GEODB_MAX_CONCURRENCY = 4
+# Seconds after which a call counts as a failure for the circuit breaker
+GEODB_SLOW_CALL = 1
+# The circuit opens after this many failures in a row and lets the next
+# call through after GEODB_BREAKER_RESET seconds
+GEODB_BREAKER_FAILURES = 5
+GEODB_BREAKER_RESET = 30
+# Offline gazetteer used instead of the GeoDB API if the file exists,
+# see 'manage.py build_gazetteer'
+GAZETTEER_PATH = BASE_DIR / "gazetteer.bin"
+# Most timeplaces that can be created with one bulk request
+TIMEPLACE_BULK_CREATE_MAX = 50
+
+# Match chats over WebSockets, see apps/match/chat.py. The broker fans the
+# messages out to the connections of a match.
+CHAT_BROKER = "apps.match.chat.MemoryBroker"
+# Messages a connection may fall behind before they're dropped for it
+CHAT_QUEUE_SIZE = 100
+# Messages are saved in one insert per CHAT_FLUSH_SIZE messages or after
+# CHAT_FLUSH_INTERVAL seconds
+CHAT_FLUSH_SIZE = 100
+CHAT_FLUSH_INTERVAL = 1
+# Unsaved messages kept while the database fails, the oldest are dropped
+CHAT_MAX_PENDING = 10000
+# Messages per page of the chat history
+CHAT_HISTORY_PAGE_SIZE = 50
+
+# Long-polling feed of matches and messages, see apps/match/feed.py. A
+# request waits at most FEED_TIMEOUT seconds and checks for changes of
+# other processes every FEED_POLL_INTERVAL seconds.
+FEED_TIMEOUT = 25
+FEED_POLL_INTERVAL = 5
+# Most matches and most messages per response
+FEED_PAGE_SIZE = 100
+# Seconds a change may be committed after the time it's stamped with, the
+# feed and the chat history tokens look back this far
+FEED_SAFETY_WINDOW = 2
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [